@@ -32,6 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'corsheaders',
@@ -149,6 +150,7 @@ CORS_ALLOW_HEADERS = default_headers + (
     "X-Pagination-Searchable-Fields",
     "X-University-Domain",
     "Link",
+    "If-None-Match",
     "x-locale",
     "x-currency",
     "Accepted-language",
@@ -163,12 +165,19 @@ CORS_EXPOSE_HEADERS = (
     "X-Pagination-Filterable-Fields",
     "X-Pagination-Searchable-Fields",
     "Link",
+    "ETag",
     "x-locale",
     "x-currency",
     "Accepted-language",
 )
 
 DEFAULT_PAGINATION_PAGE_SIZE = 10
+PAGINATION_FUZZY_THRESHOLD = float(os.getenv('_PAGINATION_FUZZY_THRESHOLD', '0.3'))
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv('_PAGINATION_COUNT_CACHE_TIMEOUT', '300'))
+PAGINATION_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('_PAGINATION_ESTIMATED_COUNT_THRESHOLD', '100000'))
+PAGINATION_REQUIRE_INDEXED_SORT = bool(int(os.getenv('_PAGINATION_REQUIRE_INDEXED_SORT', '0' if DEBUG else '1')))
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('_RESPONSE_CACHE_TIMEOUT', '300'))
+EXPORT_CHUNK_SIZE = int(os.getenv('_EXPORT_CHUNK_SIZE', '2000'))
 
 SMS_RESEND_WAITE_TIME = 60
 SMS_CODE_EXPIRE_TIME = 60 * 10
@@ -183,6 +192,14 @@ BROKER_VHOST = int(os.getenv("_BROKER_VHOST", "2"))
 CELERY_BROKER = "{}://{}:{}/{}".format(BROKER_TRANSPORT, BROKER_HOST,
                                        BROKER_PORT, BROKER_VHOST)
 
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.renderers.ORJSONRenderer',
+        'common.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+}
+
 JWT_AUTH = {
     'JWT_ENCODE_HANDLER':
         'rest_framework_jwt.utils.jwt_encode_handler',
@@ -1,8 +1,12 @@
+from django import forms
 from django.contrib import admin
 
 from .models import (
     Book,
+    BookHold,
     BookLoanHistory,
+    BookPrerequisiteClosure,
+    BookReservation,
     Genre)
 
 
@@ -12,8 +16,29 @@ class GenreAdmin(admin.ModelAdmin):
     fields = ('title',)
 
 
+class BookAdminForm(forms.ModelForm):
+    class Meta:
+        model = Book
+        fields = ('title', 'author', 'genre', 'prerequisite')
+
+    def clean_prerequisite(self):
+        prerequisites = self.cleaned_data['prerequisite']
+        if self.instance.pk:
+            cycle_edges = BookPrerequisiteClosure.get_cycle_edges(
+                (self.instance.pk, prerequisite.pk) for prerequisite in prerequisites
+            )
+            if cycle_edges:
+                raise forms.ValidationError(
+                    'These prerequisites already depend on this book: %(books)s',
+                    code='prerequisite_cycle',
+                    params={'books': ', '.join(str(Book.get_by_pk(pk)) for _, pk in cycle_edges)},
+                )
+        return prerequisites
+
+
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
+    form = BookAdminForm
     fields = ('title', 'author', 'genre', 'prerequisite')
 
     list_display = ('title', 'author', 'genre', 'state')
@@ -30,3 +55,23 @@ class BookRentHistoryAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(BookHold)
+class BookHoldAdmin(admin.ModelAdmin):
+    list_display = ('book', 'customer', 'created_at', 'state')
+    list_filter = ['state']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BookReservation)
+class BookReservationAdmin(admin.ModelAdmin):
+    list_display = ('book', 'customer', 'period', 'created_at')
+
+    def has_add_permission(self, request, obj=None):
+        return False
@@ -15,3 +15,51 @@ THE_BOOK_IS_RELEASED = {
     "code": 2002,
     "message": "The user can not back the book"
 }
+
+THE_BOOK_IS_ALREADY_LOANED = {
+    "status_code": 409,
+    "code": 2003,
+    "message": "The book is already loaned"
+}
+
+THE_BOOK_IS_NOT_LOANED = {
+    "status_code": 400,
+    "code": 2004,
+    "message": "The book is not loaned, loan it instead"
+}
+
+THE_BOOK_IS_ALREADY_HELD = {
+    "status_code": 409,
+    "code": 2005,
+    "message": "The user already waits for the book"
+}
+
+THERE_IS_NOT_ANY_HOLD = {
+    "status_code": 400,
+    "code": 2006,
+    "message": "The user does not wait for the book"
+}
+
+THE_BOOK_IS_ALREADY_RESERVED = {
+    "status_code": 409,
+    "code": 2007,
+    "message": "The book is already reserved in this period"
+}
+
+THE_BOOK_IS_RESERVED = {
+    "status_code": 409,
+    "code": 2008,
+    "message": "The book is reserved by another user"
+}
+
+THE_BOOK_IS_LOANED_IN_THIS_PERIOD = {
+    "status_code": 409,
+    "code": 2009,
+    "message": "The book is loaned in this period"
+}
+
+THE_BOOK_IS_LOANED_BY_THE_USER = {
+    "status_code": 409,
+    "code": 2010,
+    "message": "The user already has the book"
+}
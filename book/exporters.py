@@ -0,0 +1,102 @@
+import csv
+import json
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import F, Q
+
+from book.models import Book
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class BookExporter:
+    """
+    Streams the catalog as NDJSON or CSV rows read through a server-side
+    cursor, so memory stays constant whatever the size of the catalog.
+    """
+    OUTPUT_NDJSON = 'ndjson'
+    OUTPUT_CSV = 'csv'
+    CONTENT_TYPES = {
+        OUTPUT_NDJSON: 'application/x-ndjson',
+        OUTPUT_CSV: 'text/csv',
+    }
+
+    FIELDS = (
+        'id',
+        'title',
+        'author',
+        'genre_id',
+        'genre',
+        'state',
+        'prerequisite',
+        'created_at',
+        'updated_at',
+    )
+    PREREQUISITE_SEPARATOR = ';'
+
+    def __init__(self, output=OUTPUT_NDJSON, query_set=None, chunk_size=None):
+        self.output = output
+        self.query_set = query_set if query_set is not None else Book.objects.all()
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    @property
+    def content_type(self):
+        return self.CONTENT_TYPES[self.output]
+
+    @property
+    def file_name(self):
+        return 'books.{}'.format(self.output)
+
+    def get_rows(self):
+        return self.query_set.order_by('id').annotate(
+            genre_title=F('genre__title'),
+            prerequisite_ids=ArrayAgg(
+                'prerequisite__id', filter=Q(prerequisite__isnull=False), ordering='prerequisite__id'),
+        ).values_list(
+            'id',
+            'title',
+            'author',
+            'genre_id',
+            'genre_title',
+            'state',
+            'prerequisite_ids',
+            'created_at',
+            'updated_at',
+        ).iterator(chunk_size=self.chunk_size)
+
+    def stream(self):
+        """
+        Yields the export in pieces of up to `chunk_size` rows.
+        """
+        lines = self._iter_csv() if self.output == self.OUTPUT_CSV else self._iter_ndjson()
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+    def _iter_values(self):
+        for row in self.get_rows():
+            values = dict(zip(self.FIELDS, row))
+            values['created_at'] = values['created_at'].isoformat()
+            values['updated_at'] = values['updated_at'].isoformat()
+            yield values
+
+    def _iter_ndjson(self):
+        for values in self._iter_values():
+            yield json.dumps(values, ensure_ascii=False) + '\n'
+
+    def _iter_csv(self):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.FIELDS)
+        for values in self._iter_values():
+            values['prerequisite'] = self.PREREQUISITE_SEPARATOR.join(
+                str(book_id) for book_id in values['prerequisite'])
+            yield writer.writerow([values[field] for field in self.FIELDS])
@@ -0,0 +1,212 @@
+from django.db import IntegrityError
+from django.db.transaction import atomic, on_commit
+from django.utils import timezone
+from django_fsm import can_proceed
+
+from book import errors
+from book.models import Book, BookHold, BookLoanHistory, BookReservation
+from common.cache import bump_model_version
+
+
+class LoanResult:
+    def __init__(self, book_id, loan_history=None, error=None):
+        self.book_id = book_id
+        self.loan_history = loan_history  # type: BookLoanHistory
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    @property
+    def code(self):
+        return self.error['code'] if self.error else None
+
+    @property
+    def message(self):
+        return self.error['message'] if self.error else None
+
+    def get_missing_prerequisites(self) -> list:
+        if self.success or not self.loan_history:
+            return []
+        return self.loan_history.get_missing_prerequisites()
+
+
+class LoanService:
+    """
+    Loans and returns books of one customer in batches: the conditions of a
+    whole batch are evaluated from one query per kind of data, and the
+    transitions that pass are written in one transaction with bulk queries.
+    Book states only change through a compare-and-set in the database, so of
+    concurrent loans of a book exactly one wins and the others fail fast with
+    `THE_BOOK_IS_ALREADY_LOANED`. Returned books are handed off to their hold
+    queue within the same transaction.
+    """
+
+    def __init__(self, customer):
+        self.customer = customer
+
+    def check(self, book_ids) -> list:
+        """
+        Evaluates the loan conditions of the given books without loaning them,
+        one result per distinct book id in request order.
+        """
+        book_ids = list(dict.fromkeys(book_ids))
+        books = Book.objects.in_bulk(book_ids)
+        candidates = {
+            loan_history.book_id: loan_history
+            for loan_history in BookLoanHistory.get_loan_candidates(self.customer, books.values())
+        }
+        reserved_ids = BookReservation.get_reserved_book_ids(
+            list(books), self.customer, BookLoanHistory.get_loan_period())
+
+        results = []
+        for book_id in book_ids:
+            loan_history = candidates.get(book_id)
+            if not loan_history:
+                results.append(LoanResult(book_id, error=errors.THERE_IS_NOT_ANY_BOOK))
+            elif not loan_history.book.book_is_not_under_loan():
+                results.append(LoanResult(book_id, loan_history, errors.THE_BOOK_IS_ALREADY_LOANED))
+            elif book_id in reserved_ids:
+                results.append(LoanResult(book_id, loan_history, errors.THE_BOOK_IS_RESERVED))
+            elif not can_proceed(loan_history.loan):
+                results.append(LoanResult(book_id, loan_history, errors.THE_BOOK_IS_NOT_RELEASED))
+            else:
+                results.append(LoanResult(book_id, loan_history))
+        return results
+
+    def loan(self, book_ids) -> list:
+        results = self.check(book_ids)
+        for result in results:
+            if result.success:
+                result.loan_history.loan()
+
+        try:
+            self.save_loans(results)
+        except IntegrityError:
+            # Only reachable when an active loan row is written without the book
+            # lock, `save_loans` fails such books one by one otherwise.
+            for result in results:
+                if result.success:
+                    result.error = errors.THE_BOOK_IS_ALREADY_LOANED
+        return results
+
+    @atomic
+    def back(self, book_ids) -> list:
+        book_ids = list(dict.fromkeys(book_ids))
+        books = Book.objects.in_bulk(book_ids)
+        loan_histories = BookLoanHistory.get_customer_loans_by_book(self.customer, list(books))
+
+        results = []
+        for book_id in book_ids:
+            if book_id not in books:
+                results.append(LoanResult(book_id, error=errors.THERE_IS_NOT_ANY_BOOK))
+                continue
+
+            loan_history = loan_histories.get(book_id) or BookLoanHistory(customer=self.customer)
+            loan_history.book = books[book_id]
+            if not can_proceed(loan_history.back):
+                results.append(LoanResult(book_id, loan_history, errors.THE_BOOK_IS_RELEASED))
+            else:
+                loan_history.back()
+                results.append(LoanResult(book_id, loan_history))
+
+        self.save_returns(results)
+        # Still holding the row locks, so nobody polling can take a book before its queue.
+        self.hand_off([result.book_id for result in results if result.success])
+        return results
+
+    @classmethod
+    def hand_off(cls, book_ids) -> list:
+        """
+        Loans each of the given released books to the first waiting customer
+        the loan conditions allow. The conditions of the whole queue are
+        checked with batch queries, so only eligible customers are tried.
+        Customers who cannot loan the book yet, or whom another customer's
+        reservation blocks, keep their place in the queue. Returns the results
+        of the loans made.
+        """
+        results = []
+        for book_id in BookHold.get_held_book_ids(book_ids):
+            queue = list(BookHold.get_queue(book_id))
+            customer_ids = {hold.customer_id for hold in queue}
+            ineligible_ids = BookLoanHistory.get_ineligible_customer_ids(book_id, customer_ids)
+            reserver_ids = BookReservation.get_reserver_ids(book_id, BookLoanHistory.get_loan_period())
+            ineligible_ids.update(
+                customer_id for customer_id in customer_ids if reserver_ids - {customer_id})
+            for hold in queue:
+                if hold.customer_id in ineligible_ids:
+                    continue
+                result = cls(hold.customer).loan([book_id])[0]
+                if result.success:
+                    hold.fulfil()
+                    hold.save()
+                    results.append(result)
+                if result.error not in (errors.THE_BOOK_IS_NOT_RELEASED, errors.THE_BOOK_IS_RESERVED):
+                    break
+        return results
+
+    @atomic
+    def save_loans(self, results):
+        """
+        Moves the books of the successful results to `loaned`, fails with
+        `THE_BOOK_IS_ALREADY_LOANED` the results whose book a concurrent
+        request moved first or that still has an active loan row and with
+        `THE_BOOK_IS_RESERVED` those reserved meanwhile, and creates the loan
+        histories of the rest. Bulk queries
+        skip `post_save` so the catalog version is bumped here once committed.
+        """
+        results = [result for result in results if result.success]
+        if not results:
+            return
+
+        # Reservations and loan rows committed while waiting for the row locks
+        # are only visible to the statements after the lock.
+        book_ids = [result.book_id for result in results]
+        list(Book.objects.select_for_update().filter(pk__in=book_ids).order_by('pk').values_list('pk', flat=True))
+        loaned_ids = set(BookLoanHistory.objects.filter(
+            book_id__in=book_ids, state='loaned').values_list('book_id', flat=True))
+        reserved_ids = BookReservation.get_reserved_book_ids(
+            book_ids, self.customer, BookLoanHistory.get_loan_period())
+        for result in results:
+            if result.book_id in loaned_ids:
+                result.error = errors.THE_BOOK_IS_ALREADY_LOANED
+            elif result.book_id in reserved_ids:
+                result.error = errors.THE_BOOK_IS_RESERVED
+        results = [result for result in results if result.success]
+        if not results:
+            return
+
+        moved_ids = Book.compare_and_set_state(
+            [result.book_id for result in results], Book.LOAN_SOURCE_STATES, 'loaned')
+        for result in results:
+            if result.book_id not in moved_ids:
+                result.error = errors.THE_BOOK_IS_ALREADY_LOANED
+        loan_histories = [result.loan_history for result in results if result.success]
+        if not loan_histories:
+            return
+
+        now = timezone.now()
+        for loan_history in loan_histories:
+            loan_history.updated_at = now
+        BookLoanHistory.objects.bulk_create(loan_histories)
+        on_commit(lambda: bump_model_version(Book))
+
+    @atomic
+    def save_returns(self, results):
+        """
+        Gives back the loans of the successful results and releases their
+        books with one conditional update on the loan rows, failing with
+        `THE_BOOK_IS_RELEASED` the loans a concurrent request returned or
+        expired first.
+        """
+        results = [result for result in results if result.success]
+        if not results:
+            return
+
+        released_ids = BookLoanHistory.give_back_loans([result.loan_history.pk for result in results])
+        for result in results:
+            if result.book_id not in released_ids:
+                result.error = errors.THE_BOOK_IS_RELEASED
+        if released_ids:
+            on_commit(lambda: bump_model_version(Book))
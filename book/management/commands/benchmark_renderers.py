@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from book.models import Book
+from book.serializers import BookFlatSerializer, BookSerializer
+from common.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'measure how fast the book serializers and response renderers encode a page of books'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=1000, dest='page_size')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        books = self.get_books(options['page_size'])
+        if not books:
+            raise CommandError('there are no books to render, load some with load_data first')
+
+        data = BookSerializer(books, many=True).data
+        self.stdout.write('{} books, {} rounds'.format(len(books), options['repeat']))
+
+        # Both serializers are timed with the queries of the page they need.
+        for name, get_data in (
+                ('BookSerializer', lambda: BookSerializer(self.get_books(options['page_size']), many=True).data),
+                ('BookFlatSerializer', lambda: BookFlatSerializer(self.get_rows(options['page_size']), many=True).data),
+        ):
+            seconds = timeit.timeit(get_data, number=options['repeat'])
+            self.stdout.write('{:<24}{:>10.2f} ms/page'.format(name, seconds * 1000 / options['repeat']))
+
+        for renderer in (JSONRenderer(), ORJSONRenderer(), MessagePackRenderer()):
+            size = len(renderer.render(data))
+            seconds = timeit.timeit(lambda: renderer.render(data), number=options['repeat'])
+            self.stdout.write('{:<24}{:>10.2f} ms/page{:>10.1f} MB/s{:>10} bytes'.format(
+                type(renderer).__name__,
+                seconds * 1000 / options['repeat'],
+                size * options['repeat'] / seconds / 1024 / 1024,
+                size,
+            ))
+
+    @staticmethod
+    def get_books(page_size):
+        return list(Book.objects.select_related('genre').prefetch_related(
+            'prerequisite',
+        ).order_by('id')[:page_size])
+
+    @staticmethod
+    def get_rows(page_size):
+        return list(Book.objects.order_by('id').values(
+            *BookFlatSerializer.get_values_fields(BookSerializer.Meta.fields))[:page_size])
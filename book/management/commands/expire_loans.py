@@ -0,0 +1,38 @@
+import datetime
+import time
+
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+
+from book.loans import LoanService
+from book.models import Book, BookLoanHistory
+from common.cache import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'expire the loans past their back date and release their books to their hold queues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, dest='batch_size')
+        parser.add_argument('--loop', action='store_true', help='keep running, sweeping every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60, help='seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            self.stdout.write('{} loans expired'.format(self.sweep(options['batch_size'])))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size):
+        today = datetime.date.today()
+        total = 0
+        while True:
+            with atomic():
+                expired_count, book_ids = BookLoanHistory.expire_overdue_loans(today, batch_size)
+                LoanService.hand_off(book_ids)
+            total += expired_count
+            if book_ids:
+                bump_model_version(Book)
+            if expired_count < batch_size:
+                return total
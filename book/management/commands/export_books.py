@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand
+
+from book.exporters import BookExporter
+
+
+class Command(BaseCommand):
+    help = 'stream the whole catalog as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', choices=list(BookExporter.CONTENT_TYPES), default=BookExporter.OUTPUT_NDJSON,
+        )
+        parser.add_argument('--file', dest='file_path', help='write to this file instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=None, dest='chunk_size')
+
+    def handle(self, *args, **options):
+        exporter = BookExporter(options['output'], chunk_size=options['chunk_size'])
+        if not options['file_path']:
+            for chunk in exporter.stream():
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['file_path'], 'w', encoding='utf-8', newline='') as file:
+            for chunk in exporter.stream():
+                file.write(chunk)
@@ -0,0 +1,42 @@
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+from progress.bar import Bar
+
+from book.models import Book, Genre
+from common.normalizers import normalize_search_text
+
+
+class Command(BaseCommand):
+    help = 'fill the normalized search columns of genres and books'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, dest='batch_size')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.normalize(Genre, ['title'], batch_size)
+        self.normalize(Book, ['title', 'author'], batch_size)
+
+    def normalize(self, model, fields, batch_size):
+        normalized_fields = ['{}_normalized'.format(field) for field in fields]
+        bar = Bar('Normalize {}'.format(model._meta.verbose_name_plural), max=model.objects.count())
+        last_pk = 0
+        while True:
+            objects = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                'pk', *fields, *normalized_fields)[:batch_size])
+            if not objects:
+                break
+
+            changed = []
+            for obj in objects:
+                values = [normalize_search_text(getattr(obj, field)) for field in fields]
+                if values != [getattr(obj, field) for field in normalized_fields]:
+                    for field, value in zip(normalized_fields, values):
+                        setattr(obj, field, value)
+                    changed.append(obj)
+            with atomic():
+                model.objects.bulk_update(changed, normalized_fields)
+
+            last_pk = objects[-1].pk
+            bar.next(len(objects))
+        bar.finish()
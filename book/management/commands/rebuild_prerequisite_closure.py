@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+
+from book.models import BookPrerequisiteClosure
+
+
+class Command(BaseCommand):
+    help = 'rebuild the transitive closure of book prerequisites'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--book', type=int, nargs='*', dest='book_ids',
+            help='only rebuild these books and the books depending on them',
+        )
+
+    @atomic
+    def handle(self, *args, **options):
+        BookPrerequisiteClosure.refresh(options['book_ids'])
+        self.stdout.write('{} prerequisite closure rows'.format(BookPrerequisiteClosure.objects.count()))
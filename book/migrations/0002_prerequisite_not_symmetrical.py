@@ -0,0 +1,36 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+# The symmetrical field stored every edge in both directions, the reverse row
+# was inserted right after the one added, so keeping the lower id keeps the
+# direction the prerequisite was added in.
+DELETE_REVERSE_EDGES = """
+    DELETE FROM book_book_prerequisite reverse_edge
+    USING book_book_prerequisite edge
+    WHERE reverse_edge.from_book_id = edge.to_book_id
+    AND reverse_edge.to_book_id = edge.from_book_id
+    AND reverse_edge.id > edge.id
+"""
+
+DELETE_SELF_EDGES = """
+    DELETE FROM book_book_prerequisite WHERE from_book_id = to_book_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='prerequisite',
+            field=models.ManyToManyField(related_name='prerequisites', to='book.Book'),
+        ),
+        migrations.RunSQL(DELETE_REVERSE_EDGES, migrations.RunSQL.noop),
+        migrations.RunSQL(DELETE_SELF_EDGES, migrations.RunSQL.noop),
+    ]
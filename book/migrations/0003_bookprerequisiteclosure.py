@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_closure(apps, schema_editor):
+    # The prerequisite checks read only the closure, fill it with the query that maintains it.
+    from book.models import BookPrerequisiteClosure
+    BookPrerequisiteClosure.refresh()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0002_prerequisite_not_symmetrical'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookPrerequisiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(editable=False)),
+                ('ancestor', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='book.book')),
+                ('descendant', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='book.book')),
+            ],
+            options={
+                'verbose_name_plural': 'Book Prerequisite Closures',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookprerequisiteclosure',
+            index=models.Index(fields=['ancestor', 'descendant'], name='book_bookpr_ancesto_de07ed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookprerequisiteclosure',
+            constraint=models.UniqueConstraint(fields=('descendant', 'ancestor'), name='book_prerequisite_closure_unique'),
+        ),
+        migrations.RunPython(fill_closure, migrations.RunPython.noop),
+    ]
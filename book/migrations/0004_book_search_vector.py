@@ -0,0 +1,67 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION book_search_vector(title text, author text, genre_id bigint) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce((SELECT g.title FROM book_genre g WHERE g.id = genre_id), '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION book_book_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := book_search_vector(NEW.title, NEW.author, NEW.genre_id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER book_book_search_vector
+    BEFORE INSERT OR UPDATE OF title, author, genre_id ON book_book
+    FOR EACH ROW EXECUTE PROCEDURE book_book_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION book_genre_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE book_book SET search_vector = book_search_vector(title, author, genre_id) WHERE genre_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER book_genre_search_vector
+    AFTER UPDATE OF title ON book_genre
+    FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+    EXECUTE PROCEDURE book_genre_search_vector_trigger();
+
+UPDATE book_book SET search_vector = book_search_vector(title, author, genre_id);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS book_genre_search_vector ON book_genre;
+DROP FUNCTION IF EXISTS book_genre_search_vector_trigger();
+DROP TRIGGER IF EXISTS book_book_search_vector ON book_book;
+DROP FUNCTION IF EXISTS book_book_search_vector_trigger();
+DROP FUNCTION IF EXISTS book_search_vector(text, text, bigint);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0003_bookprerequisiteclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='book_book_search__29022e_gin'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 3.2.3 on 2026-10-18 14:58
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from common.normalizers import normalize_search_text
+
+NORMALIZED_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION book_search_vector(title text, author text, genre_id bigint) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce((SELECT g.title_normalized FROM book_genre g WHERE g.id = genre_id), '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION book_book_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := book_search_vector(NEW.title_normalized, NEW.author_normalized, NEW.genre_id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION book_genre_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE book_book SET search_vector = book_search_vector(title_normalized, author_normalized, genre_id)
+    WHERE genre_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS book_book_search_vector ON book_book;
+CREATE TRIGGER book_book_search_vector
+    BEFORE INSERT OR UPDATE OF title_normalized, author_normalized, genre_id ON book_book
+    FOR EACH ROW EXECUTE PROCEDURE book_book_search_vector_trigger();
+
+DROP TRIGGER IF EXISTS book_genre_search_vector ON book_genre;
+CREATE TRIGGER book_genre_search_vector
+    AFTER UPDATE OF title_normalized ON book_genre
+    FOR EACH ROW WHEN (OLD.title_normalized IS DISTINCT FROM NEW.title_normalized)
+    EXECUTE PROCEDURE book_genre_search_vector_trigger();
+"""
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION book_search_vector(title text, author text, genre_id bigint) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce((SELECT g.title FROM book_genre g WHERE g.id = genre_id), '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION book_book_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := book_search_vector(NEW.title, NEW.author, NEW.genre_id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION book_genre_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE book_book SET search_vector = book_search_vector(title, author, genre_id) WHERE genre_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS book_book_search_vector ON book_book;
+CREATE TRIGGER book_book_search_vector
+    BEFORE INSERT OR UPDATE OF title, author, genre_id ON book_book
+    FOR EACH ROW EXECUTE PROCEDURE book_book_search_vector_trigger();
+
+DROP TRIGGER IF EXISTS book_genre_search_vector ON book_genre;
+CREATE TRIGGER book_genre_search_vector
+    AFTER UPDATE OF title ON book_genre
+    FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+    EXECUTE PROCEDURE book_genre_search_vector_trigger();
+"""
+
+
+def normalize_search_fields(apps, schema_editor):
+    # Books come last so the trigger rebuilds their search vector from normalized genres.
+    for model_name, fields in (('Genre', ['title']), ('Book', ['title', 'author'])):
+        model = apps.get_model('book', model_name)
+        normalized_fields = ['{}_normalized'.format(field) for field in fields]
+        objects = []
+        for obj in model.objects.only('pk', *fields).iterator(chunk_size=1000):
+            for field, normalized_field in zip(fields, normalized_fields):
+                setattr(obj, normalized_field, normalize_search_text(getattr(obj, field)))
+            objects.append(obj)
+            if len(objects) >= 1000:
+                model.objects.bulk_update(objects, normalized_fields)
+                objects = []
+        model.objects.bulk_update(objects, normalized_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0005_book_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_book_title_trgm',
+        ),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_book_author_trgm',
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='author_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='title_normalized',
+            field=models.CharField(default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='title_normalized',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title_normalized'], name='book_book_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['author_normalized'], name='book_book_author_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(NORMALIZED_SEARCH_VECTOR_SQL, SEARCH_VECTOR_SQL),
+        migrations.RunPython(normalize_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0006_normalized_search_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['created_at', 'id'], name='book_book_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['updated_at', 'id'], name='book_book_updated_id'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'id'], name='book_book_author_id'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['state', 'id'], name='book_book_state_id'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre', 'id'], name='book_book_genre_id'),
+        ),
+    ]
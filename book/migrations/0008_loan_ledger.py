@@ -0,0 +1,37 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+# Every failed loan or return attempt used to leave a `new` row behind, which
+# the last loan lookups would take for a loan.
+DELETE_UNLOANED_HISTORIES = """
+    DELETE FROM book_bookloanhistory WHERE state = 'new'
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_book_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_UNLOANED_HISTORIES, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='bookloanhistory',
+            index=models.Index(condition=models.Q(('state', 'loaned')), fields=['customer'], include=('book',), name='book_loan_customer_active'),
+        ),
+        migrations.AddIndex(
+            model_name='bookloanhistory',
+            index=models.Index(fields=['customer', 'book', '-id'], include=('state',), name='book_loan_customer_last'),
+        ),
+        migrations.AddIndex(
+            model_name='bookloanhistory',
+            index=models.Index(fields=['book', '-id'], include=('customer',), name='book_loan_book_last'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookloanhistory',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 'loaned')), fields=('book',), name='book_loan_history_one_active_loan'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0008_loan_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookloanhistory',
+            index=models.Index(condition=models.Q(('state', 'loaned')), fields=['back_date', 'id'], name='book_loan_overdue'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_fsm
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('book', '0009_loan_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookHold',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('state', django_fsm.FSMField(default='waiting', max_length=50, protected=True)),
+                ('book', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='holds', to='book.book')),
+                ('customer', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='holds', to='users.customer')),
+            ],
+            options={
+                'verbose_name_plural': 'Book Holds',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookhold',
+            index=models.Index(condition=models.Q(('state', 'waiting')), fields=['book', 'id'], name='book_hold_queue'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookhold',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', 'waiting')), fields=('book', 'customer'), name='book_hold_one_waiting'),
+        ),
+    ]
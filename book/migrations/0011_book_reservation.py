@@ -0,0 +1,37 @@
+# Generated by Django 3.2.3 on 2026-10-18 15:18
+
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('book', '0010_book_hold'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='BookReservation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', django.contrib.postgres.fields.ranges.DateRangeField(editable=False)),
+                ('book', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='book.book')),
+                ('customer', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='users.customer')),
+            ],
+            options={
+                'verbose_name_plural': 'Book Reservations',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookreservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('book', '='), ('period', '&&')], name='book_reservation_no_overlap'),
+        ),
+    ]
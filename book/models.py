@@ -1,11 +1,18 @@
 import datetime
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, connection
+from django.utils import timezone
 from django_fsm import FSMField, transition
+from psycopg2.extras import DateRange
 from rest_framework.exceptions import NotFound
 
 from common.models import BaseModel
+from common.normalizers import normalize_search_text
 from common.pagination import PaginationSearchable, PaginationSortable, PaginationFilterable
 from users.models import Customer
 
@@ -16,10 +23,15 @@ from users.models import Customer
 
 class Genre(BaseModel):
     title = models.CharField(max_length=50)
+    title_normalized = models.CharField(max_length=50, default='', editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_normalized = normalize_search_text(self.title)
+        return super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Genres"
 
@@ -29,25 +41,29 @@ class Genre(BaseModel):
 ######################################################################################################
 
 class Book(BaseModel, PaginationSearchable, PaginationSortable, PaginationFilterable):
-    prerequisite = models.ManyToManyField('self', related_name='prerequisites')
+    MAX_PREREQUISITE_DEPTH = 64
+
+    prerequisite = models.ManyToManyField('self', related_name='prerequisites', symmetrical=False)
     title = models.CharField(max_length=300)
+    title_normalized = models.CharField(max_length=300, default='', editable=False)
     author = models.CharField(max_length=100)
+    author_normalized = models.CharField(max_length=100, default='', editable=False)
     genre = models.ForeignKey(Genre, on_delete=models.PROTECT)
     state = FSMField(default='new', protected=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     ######################################################################################################
     # Transition loan stat ###############################################################################
     ######################################################################################################
 
+    LOAN_SOURCE_STATES = ('new', 'released')
+
     def book_is_not_under_loan(self):
         return not self.state == 'loaned'
 
     @transition(
         field=state,
-        source=[
-            'new',
-            'released'
-        ],
+        source=list(LOAN_SOURCE_STATES),
         target='loaned',
         conditions=[
             book_is_not_under_loan,
@@ -77,11 +93,47 @@ class Book(BaseModel, PaginationSearchable, PaginationSortable, PaginationFilter
         The return value will be discarded.
         """
 
+    @classmethod
+    def compare_and_set_state(cls, book_ids, source_states, target_state) -> set:
+        """
+        Moves the books still in one of `source_states` to `target_state` with
+        a single conditional UPDATE and returns the ids it moved. Concurrent
+        callers racing for the same book are serialized by its row lock, and
+        the losers see the new state and are left out.
+        """
+        if not book_ids:
+            return set()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE {table} SET state = %s, updated_at = %s
+                WHERE id = ANY(%s) AND state = ANY(%s)
+                RETURNING id
+                """.format(table=cls._meta.db_table),
+                [target_state, timezone.now(), list(book_ids), list(source_states)],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_normalized = normalize_search_text(self.title)
+        self.author_normalized = normalize_search_text(self.author)
+        return super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Books"
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['title_normalized'], opclasses=['gin_trgm_ops'], name='book_book_title_trgm'),
+            GinIndex(fields=['author_normalized'], opclasses=['gin_trgm_ops'], name='book_book_author_trgm'),
+            models.Index(fields=['created_at', 'id'], name='book_book_created_id'),
+            models.Index(fields=['updated_at', 'id'], name='book_book_updated_id'),
+            models.Index(fields=['author', 'id'], name='book_book_author_id'),
+            models.Index(fields=['state', 'id'], name='book_book_state_id'),
+            models.Index(fields=['genre', 'id'], name='book_book_genre_id'),
+        ]
 
     ######################################################################################################
     # Pagination & Sort & Filter #########################################################################
@@ -94,6 +146,29 @@ class Book(BaseModel, PaginationSearchable, PaginationSortable, PaginationFilter
             'genre__title',
         ]
 
+    @classmethod
+    def get_search_vector_field(cls):
+        return 'search_vector'
+
+    @classmethod
+    def get_search_mode(cls):
+        return cls.SEARCH_MODE_FULL_TEXT
+
+    @classmethod
+    def get_normalized_fields(cls):
+        return {
+            'title': 'title_normalized',
+            'author': 'author_normalized',
+            'genre__title': 'genre__title_normalized',
+        }
+
+    @classmethod
+    def get_fuzzy_searchable_fields(cls):
+        return [
+            'title_normalized',
+            'author_normalized',
+        ]
+
     @classmethod
     def get_sortable_fields(cls):
         return [
@@ -121,6 +196,157 @@ class Book(BaseModel, PaginationSearchable, PaginationSortable, PaginationFilter
             raise NotFound('The requested Book is not found')
         return obj
 
+    @classmethod
+    def _prerequisite_tree_query(cls, book_ids, depth):
+        """
+        Builds the recursive `prerequisite_tree (root_id, parent_id, book_id, depth)`
+        CTE over the prerequisite through table, seeded from the given books or
+        from every book when `book_ids` is None.
+        """
+        table = cls.prerequisite.through._meta.db_table
+        params = []
+        seed_condition = ''
+        if book_ids is not None:
+            seed_condition = 'WHERE from_book_id IN ({})'.format(', '.join(['%s'] * len(book_ids)))
+            params.extend(book_ids)
+        params.append(min(depth or cls.MAX_PREREQUISITE_DEPTH, cls.MAX_PREREQUISITE_DEPTH))
+
+        query = """
+            WITH RECURSIVE prerequisite_tree (root_id, parent_id, book_id, depth) AS (
+                SELECT from_book_id, from_book_id, to_book_id, 1
+                FROM {table}
+                {seed_condition}
+                UNION
+                SELECT tree.root_id, edge.from_book_id, edge.to_book_id, tree.depth + 1
+                FROM {table} edge
+                INNER JOIN prerequisite_tree tree ON edge.from_book_id = tree.book_id
+                WHERE tree.depth < %s
+            )
+        """.format(table=table, seed_condition=seed_condition)
+        return query, params
+
+    @classmethod
+    def get_prerequisite_edges(cls, book_ids=None, depth=None) -> list:
+        """
+        Walks the prerequisite graph of the given books with one recursive query
+        and returns `(root_id, parent_id, book_id, depth)` rows, where `book_id`
+        is a prerequisite of `parent_id`.
+        """
+        if book_ids is not None:
+            book_ids = list(book_ids)
+            if not book_ids:
+                return []
+        query, params = cls._prerequisite_tree_query(book_ids, depth)
+        with connection.cursor() as cursor:
+            cursor.execute(query + 'SELECT root_id, parent_id, book_id, depth FROM prerequisite_tree', params)
+            return cursor.fetchall()
+
+    @classmethod
+    def get_prerequisite_tree(cls, book, depth=None) -> list:
+        """
+        Returns the book followed by all of its transitive prerequisites, loaded
+        with one recursive query. Each node carries its shortest `depth` from the
+        book and the ids of its own prerequisites inside the tree as
+        `prerequisite_ids`.
+        """
+        query, params = cls._prerequisite_tree_query([book.pk], depth)
+        query += """
+            SELECT book.*, tree.parent_id AS tree_parent_id, tree.depth AS tree_depth
+            FROM prerequisite_tree tree
+            INNER JOIN {table} book ON book.id = tree.book_id
+        """.format(table=cls._meta.db_table)
+
+        book.depth = 0
+        nodes = {book.pk: book}
+        prerequisite_ids = {book.pk: set()}
+        for row in cls.objects.raw(query, params):
+            node = nodes.setdefault(row.pk, row)
+            node.depth = min(getattr(node, 'depth', row.tree_depth), row.tree_depth)
+            prerequisite_ids.setdefault(row.tree_parent_id, set()).add(row.pk)
+
+        for node in nodes.values():
+            node.prerequisite_ids = sorted(prerequisite_ids.get(node.pk, []))
+        return sorted(nodes.values(), key=lambda node: (node.depth, node.pk))
+
+
+######################################################################################################
+# Book Prerequisite Closure Model ####################################################################
+######################################################################################################
+
+class BookPrerequisiteClosure(models.Model):
+    """
+    Transitive closure of `Book.prerequisite`: `ancestor` is a direct or
+    indirect prerequisite of `descendant`, `depth` edges away at the shortest.
+    Kept in sync by the `m2m_changed` handlers in `book.signals`.
+    """
+    ancestor = models.ForeignKey(
+        Book, on_delete=models.CASCADE, editable=False, related_name='+')
+    descendant = models.ForeignKey(
+        Book, on_delete=models.CASCADE, editable=False, related_name='+')
+    depth = models.PositiveIntegerField(editable=False)
+
+    class Meta:
+        verbose_name_plural = "Book Prerequisite Closures"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['descendant', 'ancestor'],
+                name='book_prerequisite_closure_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'descendant']),
+        ]
+
+    @classmethod
+    def get_prerequisite_ids(cls, book_id):
+        return cls.objects.filter(descendant_id=book_id).values_list('ancestor_id', flat=True)
+
+    @classmethod
+    def get_dependent_ids(cls, book_ids):
+        return cls.objects.filter(ancestor_id__in=book_ids).values_list('descendant_id', flat=True)
+
+    @classmethod
+    def get_cycle_edges(cls, edges) -> list:
+        """
+        Returns the `(book_id, prerequisite_id)` edges that would close a cycle
+        if added, i.e. the book is already a prerequisite of the prerequisite.
+        """
+        edges = list(edges)
+        condition = models.Q(pk__in=[])
+        for book_id, prerequisite_id in edges:
+            condition |= models.Q(ancestor_id=book_id, descendant_id=prerequisite_id)
+        existing = set(cls.objects.filter(condition).values_list('ancestor_id', 'descendant_id'))
+        return [
+            (book_id, prerequisite_id) for book_id, prerequisite_id in edges
+            if book_id == prerequisite_id or (book_id, prerequisite_id) in existing
+        ]
+
+    @classmethod
+    def refresh(cls, book_ids=None):
+        """
+        Recomputes the closure rows of the given books and of every book that
+        depends on them, or of the whole catalog when `book_ids` is None.
+        """
+        if book_ids is not None:
+            book_ids = set(book_ids)
+            book_ids.update(cls.get_dependent_ids(book_ids))
+            if not book_ids:
+                return
+            book_ids = sorted(book_ids)
+            cls.objects.filter(descendant_id__in=book_ids).delete()
+        else:
+            cls.objects.all().delete()
+
+        query, params = Book._prerequisite_tree_query(book_ids, None)
+        query += """
+            INSERT INTO {table} (descendant_id, ancestor_id, depth)
+            SELECT root_id, book_id, MIN(depth) FROM prerequisite_tree
+            WHERE root_id <> book_id
+            GROUP BY root_id, book_id
+        """.format(table=cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+
 
 ######################################################################################################
 # Book Loan History Model #################################################################################
@@ -145,32 +371,270 @@ class BookLoanHistory(BaseModel):
     )
     state = FSMField(default='new', protected=True)
 
+    # Loans past their `back_date` are moved to `expired` by the
+    # `expire_loans` command, bypassing the `back` transition.
+    COMPLETED_STATES = ('give_back', 'expired')
+    LOAN_DAYS = 14
+
     class Meta:
         verbose_name_plural = "Book Rent Histories"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book'], condition=models.Q(state='loaned'), name='book_loan_history_one_active_loan',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['customer'], include=['book'], condition=models.Q(state='loaned'),
+                name='book_loan_customer_active',
+            ),
+            models.Index(fields=['customer', 'book', '-id'], include=['state'], name='book_loan_customer_last'),
+            models.Index(fields=['book', '-id'], include=['customer'], name='book_loan_book_last'),
+            models.Index(fields=['back_date', 'id'], condition=models.Q(state='loaned'), name='book_loan_overdue'),
+        ]
+
+    @classmethod
+    def get_missing_prerequisites_by_book(cls, customer_id, book_ids) -> dict:
+        """
+        Anti-joins the transitive prerequisites of the given books against the
+        customer's completed loans in one query and returns the prerequisite
+        ids still missing, keyed by book id. Books with nothing missing are
+        left out.
+        """
+        missing_prerequisites = {}
+        if not book_ids:
+            return missing_prerequisites
+        completed_loans = cls.objects.filter(
+            customer_id=customer_id,
+            book_id=models.OuterRef('ancestor_id'),
+            state__in=cls.COMPLETED_STATES,
+        )
+        for book_id, prerequisite_id in BookPrerequisiteClosure.objects.filter(
+                ~models.Exists(completed_loans),
+                descendant_id__in=book_ids,
+        ).order_by('depth', 'ancestor_id').values_list('descendant_id', 'ancestor_id'):
+            missing_prerequisites.setdefault(book_id, []).append(prerequisite_id)
+        return missing_prerequisites
+
+    @classmethod
+    def get_occupied_period(cls, loan_request_date, back_date) -> DateRange:
+        """
+        The days a loan keeps the book. The back date is included: the
+        borrower can read the book until it ends and the loan only expires
+        the day after.
+        """
+        return DateRange(loan_request_date, back_date + datetime.timedelta(1))
+
+    @classmethod
+    def get_loan_period(cls) -> DateRange:
+        """
+        The days a loan made today would keep the book.
+        """
+        today = datetime.date.today()
+        return cls.get_occupied_period(today, today + datetime.timedelta(cls.LOAN_DAYS))
+
+    @classmethod
+    def get_ineligible_customer_ids(cls, book_id, customer_ids) -> set:
+        """
+        Returns which of the given customers the loan conditions stop from
+        loaning the released book: the customer whose last loan it directly
+        follows and those missing one of its prerequisites, in three queries
+        however many customers are given.
+        """
+        ineligible_ids = set()
+        last_book_loan = cls.get_last_loans_by_book([book_id]).get(book_id)
+        if last_book_loan and last_book_loan.is_directly_followed_by_loan_today():
+            ineligible_ids.add(last_book_loan.customer_id)
+
+        prerequisite_ids = list(BookPrerequisiteClosure.get_prerequisite_ids(book_id))
+        if prerequisite_ids:
+            completed_counts = dict(cls.objects.filter(
+                customer_id__in=customer_ids,
+                book_id__in=prerequisite_ids,
+                state__in=cls.COMPLETED_STATES,
+            ).order_by().values('customer_id').annotate(
+                count=models.Count('book_id', distinct=True),
+            ).values_list('customer_id', 'count'))
+            ineligible_ids.update(
+                customer_id for customer_id in customer_ids
+                if completed_counts.get(customer_id, 0) < len(prerequisite_ids)
+            )
+        return ineligible_ids
+
+    @classmethod
+    def get_loan_candidates(cls, customer, books) -> list:
+        """
+        Returns a new unsaved loan history per book, with the book, the last
+        loan of the book and the missing prerequisites already attached, so
+        the `loan` transition conditions can be evaluated for all of them
+        without further queries.
+        """
+        books = list(books)
+        book_ids = [book.pk for book in books]
+        last_loans = cls.get_last_loans_by_book(book_ids)
+        missing_prerequisites = cls.get_missing_prerequisites_by_book(customer.pk, book_ids)
+
+        candidates = []
+        for book in books:
+            loan_history = cls(customer=customer)
+            loan_history.book = book
+            loan_history._last_book_loan = last_loans.get(book.pk)
+            loan_history._missing_prerequisites = missing_prerequisites.get(book.pk, [])
+            candidates.append(loan_history)
+        return candidates
+
+    @classmethod
+    def get_customer_loans_by_book(cls, customer, book_ids) -> dict:
+        """
+        Loads the customer's last loan history of each of the given books in
+        one query, keyed by book id.
+        """
+        if not book_ids:
+            return {}
+        return {
+            loan_history.book_id: loan_history
+            for loan_history in cls.objects.filter(
+                customer_id=customer.pk,
+                book_id__in=book_ids,
+            ).order_by('book_id', '-id').distinct('book_id')
+        }
+
+    @classmethod
+    def get_last_loans_by_book(cls, book_ids) -> dict:
+        """
+        Loads the last loan history of each of the given books, whoever the
+        customer, in one query keyed by book id.
+        """
+        if not book_ids:
+            return {}
+        return {
+            loan_history.book_id: loan_history
+            for loan_history in cls.objects.filter(
+                book_id__in=book_ids,
+            ).order_by('book_id', '-id').distinct('book_id')
+        }
+
+    @classmethod
+    def expire_overdue_loans(cls, today, batch_size) -> tuple:
+        """
+        Expires up to `batch_size` loans whose `back_date` is before `today`,
+        oldest first, and releases their books in a single statement. Rows
+        locked by a concurrent sweeper are skipped. Returns the number of
+        expired loans and the ids of the released books.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH overdue AS (
+                    SELECT id FROM {history_table}
+                    WHERE state = 'loaned' AND back_date < %(today)s
+                    ORDER BY back_date, id
+                    LIMIT %(batch_size)s
+                    FOR UPDATE SKIP LOCKED
+                ), expired AS (
+                    UPDATE {history_table} SET state = 'expired', updated_at = %(now)s
+                    WHERE id IN (SELECT id FROM overdue)
+                    RETURNING book_id
+                ), released AS (
+                    UPDATE {book_table} SET state = 'released', updated_at = %(now)s
+                    WHERE id IN (SELECT book_id FROM expired) AND state = 'loaned'
+                    RETURNING id
+                )
+                SELECT (SELECT COUNT(*) FROM expired), ARRAY(SELECT id FROM released)
+                """.format(history_table=cls._meta.db_table, book_table=Book._meta.db_table),
+                {'today': today, 'batch_size': batch_size, 'now': timezone.now()},
+            )
+            expired_count, book_ids = cursor.fetchone()
+        return expired_count, book_ids
+
+    @classmethod
+    def give_back_loans(cls, loan_history_ids) -> set:
+        """
+        Gives back the given loans that are still `loaned` and releases their
+        books in a single statement, returning the ids of the released books.
+        A loan returned or expired concurrently is left out, so it never
+        releases the book of a later loan.
+        """
+        if not loan_history_ids:
+            return set()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH returned AS (
+                    UPDATE {history_table} SET state = 'give_back', updated_at = %(now)s
+                    WHERE id = ANY(%(ids)s) AND state = 'loaned'
+                    RETURNING book_id
+                )
+                UPDATE {book_table} SET state = 'released', updated_at = %(now)s
+                WHERE id IN (SELECT book_id FROM returned) AND state = 'loaned'
+                RETURNING id
+                """.format(history_table=cls._meta.db_table, book_table=Book._meta.db_table),
+                {'ids': list(loan_history_ids), 'now': timezone.now()},
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    @classmethod
+    def get_customer_loan_signature(cls, customer) -> str:
+        """
+        Changes whenever a loan history of the customer is created, updated
+        or deleted, read with one aggregate query.
+        """
+        signature = cls.objects.filter(customer_id=customer.pk).aggregate(
+            last_updated_at=models.Max('updated_at'),
+            count=models.Count('id'),
+        )
+        return '{}:{}'.format(
+            signature['last_updated_at'].isoformat() if signature['last_updated_at'] else '',
+            signature['count'],
+        )
 
     ######################################################################################################
     # Transition stats to loan ###########################################################################
     ######################################################################################################
 
+    def get_missing_prerequisites(self) -> list:
+        if not hasattr(self, '_missing_prerequisites'):
+            self._missing_prerequisites = BookLoanHistory.get_missing_prerequisites_by_book(
+                self.customer_id,
+                [self.book_id],
+            ).get(self.book_id, [])
+        return self._missing_prerequisites
+
     def user_has_prerequisite_permission(self):
-        pr = self.book.prerequisite.values_list('id', flat=True)
-        if not pr:
-            return True
-        user_pr = BookLoanHistory.objects.filter(
-            customer_id=self.customer.pk,
-            book_id__in=list(pr),
-            state__exact='give_back'
-
-        ).values_list('book_id', flat=True)
-        if not set(pr) == set(user_pr):
-            return False
-        return True
+        return not self.get_missing_prerequisites()
 
     def book_is_not_under_loan(self):
         return not self.book.state == 'loaned'
 
+    def get_last_book_loan(self) -> 'BookLoanHistory':
+        if not hasattr(self, '_last_book_loan'):
+            self._last_book_loan = BookLoanHistory.get_last_loans_by_book([self.book_id]).get(self.book_id)
+        return self._last_book_loan
+
     def user_does_not_loan_book(self):
-        return not self.state == 'loaned'
+        if self.state == 'loaned':
+            return False
+        last_book_loan = self.get_last_book_loan()
+        return not (last_book_loan and last_book_loan.customer_id == self.customer_id
+                    and last_book_loan.state == 'loaned')
+
+    def is_directly_followed_by_loan_today(self) -> bool:
+        """
+        Whether a loan made today would directly follow this one, that is start
+        within one loan period of its back date.
+        """
+        return bool(self.back_date) and (
+            datetime.date.today() < self.back_date + datetime.timedelta(self.LOAN_DAYS))
+
+    def user_did_not_loan_book_last(self):
+        """
+        A customer cannot borrow the same book twice in a row: unless someone
+        else loaned it in between, the customer has to wait one loan period
+        past the back date of their last loan of it.
+        """
+        last_book_loan = self.get_last_book_loan()
+        return not (last_book_loan and last_book_loan.customer_id == self.customer_id
+                    and last_book_loan.is_directly_followed_by_loan_today())
 
     @transition(
         field=state,
@@ -178,6 +642,7 @@ class BookLoanHistory(BaseModel):
         target='loaned',
         conditions=[
             user_does_not_loan_book,
+            user_did_not_loan_book_last,
             user_has_prerequisite_permission,
             book_is_not_under_loan
         ])
@@ -188,10 +653,9 @@ class BookLoanHistory(BaseModel):
         The return value will be discarded.
         """
         self.rent_date = datetime.datetime.now()
-        self.back_date = datetime.datetime.now() + datetime.timedelta(14)
+        self.back_date = datetime.date.today() + datetime.timedelta(self.LOAN_DAYS)
+        # Saved along with the book by `book.loans.LoanService`.
         self.book.loan()
-        self.book.save()
-        self.save()
 
     ######################################################################################################
     # Transition stats to back ###########################################################################
@@ -222,8 +686,177 @@ class BookLoanHistory(BaseModel):
         like updating caches, notifying users, etc.
         The return value will be discarded.
         """
+        # Saved along with the book by `book.loans.LoanService`.
         self.book.back()
-        self.book.save()
-        self.save()
+
+######################################################################################################
+# Book Hold Model ####################################################################################
+######################################################################################################
+
+class BookHold(BaseModel):
+    """
+    A customer waiting for a loaned book. The waiting holds of a book are
+    served in the order they were placed once the book is released.
+    """
+    book = models.ForeignKey(
+        Book, on_delete=models.PROTECT, editable=False, related_name='holds')
+    customer = models.ForeignKey(
+        Customer, on_delete=models.PROTECT, editable=False, related_name='holds')
+    state = FSMField(default='waiting', protected=True)
+
+    class Meta:
+        verbose_name_plural = "Book Holds"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'customer'], condition=models.Q(state='waiting'), name='book_hold_one_waiting',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['book', 'id'], condition=models.Q(state='waiting'), name='book_hold_queue'),
+        ]
+
+    def __str__(self):
+        return '{} - {}'.format(self.book, self.customer)
+
+    @classmethod
+    def get_waiting_hold(cls, customer, book_id) -> 'BookHold':
+        return cls.objects.filter(customer_id=customer.pk, book_id=book_id, state='waiting').first()
+
+    @classmethod
+    def get_queue(cls, book_id):
+        return cls.objects.filter(book_id=book_id, state='waiting').select_related('customer').order_by('id')
+
+    @classmethod
+    def get_held_book_ids(cls, book_ids) -> list:
+        """
+        Returns the ids of the given books that have customers waiting for
+        them, in one query.
+        """
+        if not book_ids:
+            return []
+        return list(cls.objects.filter(
+            book_id__in=book_ids,
+            state='waiting',
+        ).order_by('book_id').distinct('book_id').values_list('book_id', flat=True))
+
+    def get_position(self):
+        if self.state != 'waiting':
+            return None
+        return BookHold.objects.filter(book_id=self.book_id, state='waiting', id__lt=self.pk).count() + 1
+
+    @transition(field=state, source='waiting', target='fulfilled')
+    def fulfil(self):
+        """
+        The book was loaned to the customer of the hold.
+        """
+
+    @transition(field=state, source='waiting', target='cancelled')
+    def cancel(self):
+        """
+        The customer left the queue.
+        """
+
+######################################################################################################
+# Book Reservation Model #############################################################################
+######################################################################################################
+
+class BookReservation(BaseModel):
+    """
+    A customer's claim on a book for a future window. Postgres rejects
+    overlapping windows of the same book through the exclusion constraint,
+    whose GiST index also serves the availability range queries.
+    """
+    RESERVATION_DAYS = 14
+
+    book = models.ForeignKey(
+        Book, on_delete=models.PROTECT, editable=False, related_name='reservations')
+    customer = models.ForeignKey(
+        Customer, on_delete=models.PROTECT, editable=False, related_name='reservations')
+    # Half open, the upper bound is the first day the book is free again.
+    period = DateRangeField(editable=False)
+
+    class Meta:
+        verbose_name_plural = "Book Reservations"
+        constraints = [
+            ExclusionConstraint(
+                name='book_reservation_no_overlap',
+                expressions=[
+                    ('book', RangeOperators.EQUAL),
+                    ('period', RangeOperators.OVERLAPS),
+                ],
+            ),
+        ]
+
+    def __str__(self):
+        return '{} - {} {}'.format(self.book, self.customer, self.period)
+
+    @classmethod
+    def reserve(cls, book, customer, start_date) -> 'BookReservation':
+        """
+        Returns None when the active loan of the book overlaps the window and
+        raises `IntegrityError` when another reservation does. The book row is
+        locked first, so a concurrent loan either sees the reservation or is
+        seen by it; call it in a transaction.
+        """
+        list(Book.objects.select_for_update().filter(pk=book.pk).values_list('pk', flat=True))
+        if BookLoanHistory.objects.filter(book_id=book.pk, state='loaned', back_date__gte=start_date).exists():
+            return None
+        return cls.objects.create(
+            book=book,
+            customer=customer,
+            period=DateRange(start_date, start_date + datetime.timedelta(cls.RESERVATION_DAYS)),
+        )
+
+    @classmethod
+    def get_reserved_book_ids(cls, book_ids, customer, period) -> set:
+        """
+        Returns the ids of the given books another customer reserved for part
+        of `period`.
+        """
+        if not book_ids:
+            return set()
+        return set(cls.objects.filter(
+            book_id__in=book_ids,
+            period__overlap=period,
+        ).exclude(customer_id=customer.pk).values_list('book_id', flat=True))
+
+    @classmethod
+    def get_reserver_ids(cls, book_id, period) -> set:
+        """
+        Returns the ids of the customers who reserved the book for part of
+        `period`.
+        """
+        return set(cls.objects.filter(
+            book_id=book_id,
+            period__overlap=period,
+        ).values_list('customer_id', flat=True))
+
+    @classmethod
+    def get_free_windows(cls, book_id, start_date, end_date) -> list:
+        """
+        Returns the half open ranges between `start_date` and
+        `end_date` not covered by any reservation of the book nor by its
+        active loan, reading only the reservations overlapping that range.
+        """
+        periods = list(cls.objects.filter(
+            book_id=book_id,
+            period__overlap=DateRange(start_date, end_date),
+        ).values_list('period', flat=True))
+        periods.extend(
+            BookLoanHistory.get_occupied_period(loan_request_date or start_date, back_date)
+            for loan_request_date, back_date in BookLoanHistory.objects.filter(
+                book_id=book_id, state='loaned', back_date__gte=start_date,
+            ).values_list('loan_request_date', 'back_date')
+        )
+
+        windows = []
+        free_from = start_date
+        for period in sorted(periods, key=lambda period: period.lower):
+            if period.lower > free_from:
+                windows.append(DateRange(free_from, period.lower))
+            free_from = max(free_from, period.upper)
+        if free_from < end_date:
+            windows.append(DateRange(free_from, end_date))
+        return windows
 
 ######################################################################################################
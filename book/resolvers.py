@@ -0,0 +1,47 @@
+from book.models import BookLoanHistory
+from users.models import Customer
+
+
+class LoanStatusResolver:
+    """
+    Collects the books rendered during a request and answers their loan
+    status from a single query per batch of collected books.
+    """
+
+    def __init__(self, customer):
+        self.customer = customer
+        self._pending_ids = set()
+        self._loaded_ids = set()
+        self._loan_histories = {}
+
+    @classmethod
+    def from_request(cls, request) -> 'LoanStatusResolver':
+        user = getattr(request, 'user', None)
+        if not isinstance(user, Customer):
+            return None
+        return cls(user)
+
+    def add(self, books):
+        self.add_ids(book.pk for book in books)
+
+    def add_ids(self, book_ids):
+        for book_id in book_ids:
+            if book_id not in self._loaded_ids:
+                self._pending_ids.add(book_id)
+
+    def get(self, book) -> BookLoanHistory:
+        return self.get_by_id(book.pk)
+
+    def get_by_id(self, book_id) -> BookLoanHistory:
+        if book_id not in self._loaded_ids:
+            self._pending_ids.add(book_id)
+            self._load()
+        return self._loan_histories.get(book_id)
+
+    def _load(self):
+        book_ids = list(self._pending_ids)
+        self._loan_histories.update(
+            BookLoanHistory.get_customer_loans_by_book(self.customer, book_ids)
+        )
+        self._loaded_ids.update(book_ids)
+        self._pending_ids.clear()
@@ -1,10 +1,14 @@
-from django.contrib.auth.models import AnonymousUser
+import datetime
+
+from django.db import models
+from django.db.models import prefetch_related_objects
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
-from book.models import Book, Genre, BookLoanHistory
-from common.serializers import BaseModelSerializer
-from users.models import Customer
+from book.exporters import BookExporter
+from book.models import Book, BookHold, BookReservation, Genre, BookLoanHistory
+from book.resolvers import LoanStatusResolver
+from common.serializers import BaseSerializer, BaseModelSerializer
 
 
 class GenreSerializer(BaseModelSerializer):
@@ -28,9 +32,17 @@ class RecursiveField(serializers.Serializer):
         return serializer.data
 
 
+class SubBookListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        # In id order, as `BookFlatListSerializer` renders them.
+        return super().to_representation(sorted(iterable, key=lambda book: book.pk))
+
+
 class SubBookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
+        list_serializer_class = SubBookListSerializer
         fields = (
             'title',
             'genre',
@@ -39,13 +51,47 @@ class SubBookSerializer(serializers.ModelSerializer):
         )
 
 
-class BookSerializer(BaseModelSerializer):
+class LoanStatusSerializerMixin:
+    def get_loan_status_resolver(self) -> LoanStatusResolver:
+        if 'loan_status_resolver' not in self.context:
+            self.context['loan_status_resolver'] = LoanStatusResolver.from_request(
+                self.context.get('request', None)
+            )
+        return self.context['loan_status_resolver']
+
+    @swagger_serializer_method(serializer_or_field=BookLoanHistorySerializer)
+    def get_loan_status(self, obj):
+        return self.get_loan_status_data(self.get_loan_status_resolver(), obj.pk)
+
+    @staticmethod
+    def get_loan_status_data(resolver, book_id):
+        if not resolver:
+            return None
+
+        loan_history = resolver.get_by_id(book_id)
+        if not loan_history:
+            return None
+
+        return BookLoanHistorySerializer(loan_history).data
+
+
+class BookListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        resolver = self.child.get_loan_status_resolver()
+        if resolver:
+            resolver.add(iterable)
+        return super().to_representation(iterable)
+
+
+class BookSerializer(LoanStatusSerializerMixin, BaseModelSerializer):
     genre = GenreSerializer()
     loan_status = serializers.SerializerMethodField()
     prerequisite = SubBookSerializer(many=True)
 
     class Meta:
         model = Book
+        list_serializer_class = BookListSerializer
         fields = (
             'id',
             'title',
@@ -56,25 +102,80 @@ class BookSerializer(BaseModelSerializer):
             'loan_status'
         )
 
-    @swagger_serializer_method(serializer_or_field=BookLoanHistorySerializer)
-    def get_loan_status(self, obj):
-        request = self.context.get('request', None)
-        if not request or \
-                isinstance(request.user, AnonymousUser) or \
-                not hasattr(request, 'user') or \
-                not isinstance(request.user, Customer):
-            return None
 
-        loan_history = request.user.get_loans().filter(
-            book=obj,
-        ).first()
-        if not loan_history:
-            return None
+class BookFlatListSerializer(serializers.ListSerializer):
+    """
+    Renders the output of `BookSerializer` from `.values()` rows of books, the
+    prerequisites and loan statuses of the whole page are read with one query
+    each and no model or field serializer is built per row.
+    """
 
-        return BookLoanHistorySerializer(loan_history).data
+    def to_representation(self, data):
+        rows = list(data)
+        field_names = BookSerializer.get_requested_field_names(
+            self.context.get('request', None), BookSerializer.Meta.fields)
+        book_ids = [row['id'] for row in rows]
+
+        prerequisites = self.get_prerequisites(book_ids) if 'prerequisite' in field_names else {}
+        resolver = self.child.get_loan_status_resolver() if 'loan_status' in field_names else None
+        if resolver:
+            resolver.add_ids(book_ids)
 
+        books = []
+        for row in rows:
+            book = {}
+            for field_name in field_names:
+                if field_name == 'genre':
+                    book['genre'] = {'id': row['genre_id'], 'title': row['genre__title']}
+                elif field_name == 'prerequisite':
+                    book['prerequisite'] = prerequisites.get(row['id'], [])
+                elif field_name == 'loan_status':
+                    book['loan_status'] = self.child.get_loan_status_data(resolver, row['id'])
+                else:
+                    book[field_name] = row[field_name]
+            books.append(book)
+        return books
+
+    @staticmethod
+    def get_prerequisites(book_ids) -> dict:
+        """
+        `SubBookSerializer` output of the prerequisites of the given books,
+        keyed by book id.
+        """
+        prerequisites = {}
+        for book_id, title, genre_id, state in Book.prerequisite.through.objects.filter(
+                from_book_id__in=book_ids,
+        ).order_by('from_book_id', 'to_book_id').values_list(
+            'from_book_id',
+            'to_book__title',
+            'to_book__genre_id',
+            'to_book__state',
+        ):
+            prerequisites.setdefault(book_id, []).append({'title': title, 'genre': genre_id, 'state': state})
+        return prerequisites
+
+
+class BookFlatSerializer(LoanStatusSerializerMixin, BaseSerializer):
+    """
+    Read-only fast path of `BookSerializer` for listings, only usable with
+    `many=True` on rows of `get_values_fields`.
+    """
+
+    class Meta:
+        list_serializer_class = BookFlatListSerializer
 
-class BookSingleSerializer(BaseModelSerializer):
+    @staticmethod
+    def get_values_fields(field_names) -> list:
+        values_fields = ['id']
+        for field_name in ('title', 'author', 'state'):
+            if field_name in field_names:
+                values_fields.append(field_name)
+        if 'genre' in field_names:
+            values_fields.extend(['genre_id', 'genre__title'])
+        return values_fields
+
+
+class BookSingleSerializer(LoanStatusSerializerMixin, BaseModelSerializer):
     genre = GenreSerializer()
     prerequisite = BookSerializer(many=True)
     loan_status = serializers.SerializerMethodField()
@@ -91,19 +192,146 @@ class BookSingleSerializer(BaseModelSerializer):
             'loan_status'
         )
 
+    def to_representation(self, instance):
+        resolver = self.get_loan_status_resolver() if 'loan_status' in self.fields else None
+        if resolver:
+            resolver.add([instance])
+        if 'prerequisite' in self.fields:
+            prefetch_related_objects([instance], 'prerequisite__genre', 'prerequisite__prerequisite')
+            if resolver:
+                resolver.add(instance.prerequisite.all())
+        return super().to_representation(instance)
+
+
+class PrerequisiteTreeQuerySerializer(BaseSerializer):
+    depth = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=Book.MAX_PREREQUISITE_DEPTH,
+    )
+
+
+class PrerequisiteTreeSerializer(BaseModelSerializer):
+    depth = serializers.IntegerField()
+    prerequisite = serializers.ListField(
+        source='prerequisite_ids',
+        child=serializers.IntegerField(),
+    )
+
+    class Meta:
+        model = Book
+        fields = (
+            'id',
+            'title',
+            'author',
+            'genre',
+            'state',
+            'depth',
+            'prerequisite',
+        )
+
+
+class BookExportQuerySerializer(BaseSerializer):
+    output = serializers.ChoiceField(
+        choices=list(BookExporter.CONTENT_TYPES),
+        default=BookExporter.OUTPUT_NDJSON,
+    )
+
+
+class BookIdsRequestSerializer(BaseSerializer):
+    books = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=100,
+    )
+
+
+class BookEligibilitySerializer(BaseSerializer):
+    id = serializers.IntegerField(source='book_id')
+    can_loan = serializers.BooleanField(source='success')
+    code = serializers.IntegerField(allow_null=True)
+    message = serializers.CharField(allow_null=True)
+    # Null when the book does not exist.
+    book_is_not_under_loan = serializers.BooleanField(
+        source='loan_history.book_is_not_under_loan', allow_null=True)
+    user_does_not_loan_book = serializers.BooleanField(
+        source='loan_history.user_does_not_loan_book', allow_null=True)
+    user_did_not_loan_book_last = serializers.BooleanField(
+        source='loan_history.user_did_not_loan_book_last', allow_null=True)
+    user_has_prerequisite_permission = serializers.BooleanField(
+        source='loan_history.user_has_prerequisite_permission', allow_null=True)
+    missing_prerequisites = serializers.ListField(
+        source='get_missing_prerequisites',
+        child=serializers.IntegerField(),
+    )
+
+
+class BookLoanResultSerializer(BaseSerializer):
+    id = serializers.IntegerField(source='book_id')
+    success = serializers.BooleanField()
+    code = serializers.IntegerField(allow_null=True)
+    message = serializers.CharField(allow_null=True)
+    missing_prerequisites = serializers.ListField(
+        source='get_missing_prerequisites',
+        child=serializers.IntegerField(),
+    )
+    loan_status = serializers.SerializerMethodField()
+
     @swagger_serializer_method(serializer_or_field=BookLoanHistorySerializer)
     def get_loan_status(self, obj):
-        request = self.context.get('request', None)
-        if not request or \
-                isinstance(request.user, AnonymousUser) or \
-                not hasattr(request, 'user') or \
-                not isinstance(request.user, Customer):
+        if not obj.loan_history or not obj.loan_history.pk:
             return None
+        return BookLoanHistorySerializer(obj.loan_history).data
 
-        loan_history = request.user.get_loans().filter(
-            book=obj,
-        ).first()
-        if not loan_history:
-            return None
 
-        return BookLoanHistorySerializer(loan_history).data
+class BookHoldSerializer(BaseModelSerializer):
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BookHold
+        fields = ('id', 'book', 'state', 'position', 'created_at')
+
+    @swagger_serializer_method(serializer_or_field=serializers.IntegerField(allow_null=True))
+    def get_position(self, obj):
+        return obj.get_position()
+
+
+class BookAvailabilityQuerySerializer(BaseSerializer):
+    MAX_DAYS = 366
+    DEFAULT_DAYS = 90
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('start', datetime.date.today() + datetime.timedelta(1))
+        attrs.setdefault('end', attrs['start'] + datetime.timedelta(self.DEFAULT_DAYS))
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError({'end': ['The end must be after the start']})
+        if (attrs['end'] - attrs['start']).days > self.MAX_DAYS:
+            raise serializers.ValidationError({'end': ['The range can not be longer than {} days'.format(
+                self.MAX_DAYS)]})
+        return attrs
+
+
+class BookAvailabilitySerializer(BaseSerializer):
+    start = serializers.DateField(source='lower')
+    end = serializers.DateField(source='upper')
+
+
+class BookReservationRequestSerializer(BaseSerializer):
+    start_date = serializers.DateField()
+
+    def validate_start_date(self, value):
+        if value <= datetime.date.today():
+            raise serializers.ValidationError('The reservation must start in the future')
+        return value
+
+
+class BookReservationSerializer(BaseModelSerializer):
+    start_date = serializers.DateField(source='period.lower', read_only=True)
+    end_date = serializers.DateField(source='period.upper', read_only=True)
+
+    class Meta:
+        model = BookReservation
+        fields = ('id', 'book', 'start_date', 'end_date', 'created_at')
@@ -0,0 +1,55 @@
+from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.db.transaction import on_commit
+from django.dispatch import receiver
+
+from book.models import Book, BookPrerequisiteClosure, Genre
+from common.cache import bump_model_version
+
+
+@receiver(m2m_changed, sender=Book.prerequisite.through)
+def book_prerequisite_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add':
+        if reverse:
+            edges = [(book_id, instance.pk) for book_id in pk_set]
+        else:
+            edges = [(instance.pk, prerequisite_id) for prerequisite_id in pk_set]
+        cycle_edges = BookPrerequisiteClosure.get_cycle_edges(edges)
+        if cycle_edges:
+            raise ValidationError(
+                'Adding these prerequisites would create a cycle: %(edges)s',
+                code='prerequisite_cycle',
+                params={'edges': cycle_edges},
+            )
+
+    elif action in ('post_add', 'post_remove'):
+        BookPrerequisiteClosure.refresh(pk_set if reverse else [instance.pk])
+        on_commit(lambda: bump_model_version(Book))
+
+    elif action == 'post_clear':
+        if reverse:
+            BookPrerequisiteClosure.refresh(BookPrerequisiteClosure.get_dependent_ids([instance.pk]))
+        else:
+            BookPrerequisiteClosure.refresh([instance.pk])
+        on_commit(lambda: bump_model_version(Book))
+
+
+@receiver(pre_delete, sender=Book)
+def book_pre_delete(sender, instance, **kwargs):
+    instance._prerequisite_dependent_ids = list(
+        BookPrerequisiteClosure.get_dependent_ids([instance.pk])
+    )
+
+
+@receiver(post_delete, sender=Book)
+def book_post_delete(sender, instance, **kwargs):
+    BookPrerequisiteClosure.refresh(getattr(instance, '_prerequisite_dependent_ids', []))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def catalog_changed(sender, **kwargs):
+    # Bumped once committed, so no reader caches the old rows under the new version.
+    on_commit(lambda: bump_model_version(Book))
@@ -20,16 +20,72 @@ BookDetail_GET = {
     status.HTTP_404_NOT_FOUND: 'Requested tenant not found',
 }
 
+BookPrerequisites_GET = {
+    status.HTTP_200_OK: PrerequisiteTreeSerializer(many=True),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+    status.HTTP_404_NOT_FOUND: 'Information not found',
+}
+
+BookEligibility_POST = {
+    status.HTTP_200_OK: BookEligibilitySerializer(many=True),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+}
+
+BookExport_GET = {
+    status.HTTP_200_OK: 'The whole catalog, one book per line',
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+}
+
 BOOK_LOAN_PUT = {
     status.HTTP_204_NO_CONTENT: '',
     status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
     status.HTTP_404_NOT_FOUND: 'Information not found',
+    status.HTTP_409_CONFLICT: 'The book is already loaned or reserved by another user',
 }
 BOOK_LOAN_DELETE = {
     status.HTTP_204_NO_CONTENT: '',
     status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
     status.HTTP_404_NOT_FOUND: 'Information not found',
 }
+BOOK_HOLD_PUT = {
+    status.HTTP_201_CREATED: BookHoldSerializer(),
+    status.HTTP_400_BAD_REQUEST: 'The book is not loaned',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+    status.HTTP_409_CONFLICT: 'The user already waits for or has the book',
+}
+BOOK_HOLD_DELETE = {
+    status.HTTP_204_NO_CONTENT: '',
+    status.HTTP_400_BAD_REQUEST: 'The user does not wait for the book',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+}
+BookAvailability_GET = {
+    status.HTTP_200_OK: BookAvailabilitySerializer(many=True),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+    status.HTTP_404_NOT_FOUND: 'Information not found',
+}
+BookReservation_POST = {
+    status.HTTP_201_CREATED: BookReservationSerializer(),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+    status.HTTP_404_NOT_FOUND: 'Information not found',
+    status.HTTP_409_CONFLICT: 'The book is already reserved or loaned in this period',
+}
+BookBulkLoan_PUT = {
+    status.HTTP_200_OK: BookLoanResultSerializer(many=True),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+}
+
+BookBulkLoan_DELETE = {
+    status.HTTP_200_OK: BookLoanResultSerializer(many=True),
+    status.HTTP_400_BAD_REQUEST: 'The user request is not valid',
+    status.HTTP_401_UNAUTHORIZED: 'Authentication credentials were not provided.',
+}
+
 # ==================================
 #    Book API Parameters
 # ==================================
@@ -39,6 +95,37 @@ BOOK_SEARCH = openapi.Parameter(
     description='Search in title & genre & author book',
 )
 
+BOOK_SEARCH_MODE = openapi.Parameter(
+    name='search_mode', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    enum=['fulltext', 'contains'],
+    description='fulltext (default) matches ranked word prefixes, contains matches substrings',
+)
+
+BOOK_FUZZY = openapi.Parameter(
+    name='fuzzy', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Typo tolerant search in title & author book, ordered by similarity',
+)
+
+BOOK_FUZZY_THRESHOLD = openapi.Parameter(
+    name='fuzzy_threshold', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_NUMBER,
+    description='Minimum trigram similarity between 0 and 1 for fuzzy search',
+)
+
+BOOK_COUNT = openapi.Parameter(
+    name='count', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_BOOLEAN,
+    description='Pass false to skip the total count, the next page is still linked',
+)
+
+BOOK_CURSOR = openapi.Parameter(
+    name='cursor', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Keyset pagination, empty for the first page, then the cursor of the next link in the Link header',
+)
+
 BOOK_FILTER_STATE = openapi.Parameter(
     name='filter_state', in_=openapi.IN_QUERY,
     type=openapi.TYPE_STRING,
@@ -57,6 +144,24 @@ BOOK_FILTER_GENRE_TITLE = openapi.Parameter(
     description='Filter books by genre title',
 )
 
+BOOK_IN_GENRE_TITLE = openapi.Parameter(
+    name='in__genre__title', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Filter books by any of the comma separated genre titles',
+)
+
+BOOK_FIELDS = openapi.Parameter(
+    name='fields', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Comma separated fields to render, all fields when empty',
+)
+
+BOOK_EXCLUDE = openapi.Parameter(
+    name='exclude', in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    description='Comma separated fields to leave out',
+)
+
 # ==================================
 #     Tenant Swagger Decorators
 # ==================================
@@ -65,14 +170,47 @@ book_list = swagger_auto_schema(
     responses=BookList_GET,
     manual_parameters=[
         BOOK_SEARCH,
+        BOOK_SEARCH_MODE,
+        BOOK_FUZZY,
+        BOOK_FUZZY_THRESHOLD,
+        BOOK_COUNT,
+        BOOK_CURSOR,
         BOOK_FILTER_STATE,
         BOOK_FILTER_AUTHOR,
         BOOK_FILTER_GENRE_TITLE,
+        BOOK_IN_GENRE_TITLE,
+        BOOK_FIELDS,
+        BOOK_EXCLUDE,
     ],
     PaginatorInspector=[PageNumberPagination]
 
 )
-book_retrieve = swagger_auto_schema(operation_description='Retrieve Book', responses=BookDetail_GET)
+book_retrieve = swagger_auto_schema(
+    operation_description='Retrieve Book',
+    responses=BookDetail_GET,
+    manual_parameters=[
+        BOOK_FIELDS,
+        BOOK_EXCLUDE,
+    ],
+)
+
+book_prerequisites = swagger_auto_schema(
+    operation_description='Transitive prerequisites of a book, the book itself comes first with depth 0',
+    responses=BookPrerequisites_GET,
+    query_serializer=PrerequisiteTreeQuerySerializer(),
+)
+
+book_export = swagger_auto_schema(
+    operation_description='Stream the whole catalog as NDJSON or CSV',
+    responses=BookExport_GET,
+    query_serializer=BookExportQuerySerializer(),
+)
+
+book_eligibility = swagger_auto_schema(
+    operation_description='Whether the current user can loan each of the requested books',
+    responses=BookEligibility_POST,
+    request_body=BookIdsRequestSerializer(),
+)
 
 book_loan = swagger_auto_schema(
     operation_description='loan Book',
@@ -83,3 +221,37 @@ book_back = swagger_auto_schema(
     operation_description='back Book',
     responses=BOOK_LOAN_DELETE
 )
+
+book_bulk_loan = swagger_auto_schema(
+    operation_description='Loan several books at once, with the result of each book',
+    responses=BookBulkLoan_PUT,
+    request_body=BookIdsRequestSerializer(),
+)
+
+book_bulk_back = swagger_auto_schema(
+    operation_description='Back several books at once, with the result of each book',
+    responses=BookBulkLoan_DELETE,
+    request_body=BookIdsRequestSerializer(),
+)
+
+book_hold = swagger_auto_schema(
+    operation_description='Wait for a loaned book, it is loaned to the user when their turn comes',
+    responses=BOOK_HOLD_PUT,
+)
+
+book_unhold = swagger_auto_schema(
+    operation_description='Stop waiting for a book',
+    responses=BOOK_HOLD_DELETE,
+)
+
+book_availability = swagger_auto_schema(
+    operation_description='Free windows of a book between start and end, the end of each window is exclusive',
+    responses=BookAvailability_GET,
+    query_serializer=BookAvailabilityQuerySerializer(),
+)
+
+book_reserve = swagger_auto_schema(
+    operation_description='Reserve a book for {} days from start_date'.format(BookReservation.RESERVATION_DAYS),
+    responses=BookReservation_POST,
+    request_body=BookReservationRequestSerializer(),
+)
@@ -1 +1,229 @@
-# Create your tests here.
+import datetime
+import json
+import threading
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from rest_framework import serializers
+from rest_framework.request import Request
+
+from book import errors
+from book.serializers import BookFlatSerializer, BookSerializer
+from book.loans import LoanService
+from book.models import Book, BookHold, BookLoanHistory, BookPrerequisiteClosure, Genre
+from common.pagination import CursorPagination
+from users.models import Customer
+
+
+def create_books(count):
+    genre = Genre.objects.create(title='Folklore')
+    return [
+        Book.objects.create(title='book {}'.format(index), author='author {}'.format(index), genre=genre)
+        for index in range(count)
+    ]
+
+
+def create_customer(index=0):
+    return Customer.objects.create(
+        email='customer{}@example.com'.format(index), first_name='first', last_name='last')
+
+
+class BookPrerequisiteClosureTest(TestCase):
+    def setUp(self):
+        self.first, self.second, self.third = create_books(3)
+
+    def get_closure(self):
+        return set(BookPrerequisiteClosure.objects.values_list('descendant_id', 'ancestor_id', 'depth'))
+
+    def test_add_refreshes_transitive_prerequisites(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second)
+
+        self.assertEqual(self.get_closure(), {
+            (self.second.pk, self.first.pk, 1),
+            (self.third.pk, self.second.pk, 1),
+            (self.third.pk, self.first.pk, 2),
+        })
+
+    def test_add_keeps_shortest_depth(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second, self.first)
+
+        self.assertIn((self.third.pk, self.first.pk, 1), self.get_closure())
+
+    def test_remove_refreshes_dependent_books(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second)
+
+        self.second.prerequisite.remove(self.first)
+
+        self.assertEqual(self.get_closure(), {(self.third.pk, self.second.pk, 1)})
+
+    def test_clear_refreshes_dependent_books(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second)
+
+        self.second.prerequisite.clear()
+
+        self.assertEqual(self.get_closure(), {(self.third.pk, self.second.pk, 1)})
+
+    def test_reverse_clear_refreshes_dependent_books(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second)
+
+        self.first.prerequisites.clear()
+
+        self.assertEqual(self.get_closure(), {(self.third.pk, self.second.pk, 1)})
+
+    def test_add_rejects_cycles(self):
+        self.second.prerequisite.add(self.first)
+        self.third.prerequisite.add(self.second)
+
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.first.prerequisite.add(self.third)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.first.prerequisite.add(self.first)
+        self.assertFalse(self.first.prerequisite.exists())
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.books = create_books(7)
+        # Ties on the sort key have to be split by the id tiebreaker across pages.
+        created_at = self.books[0].created_at
+        Book.objects.filter(pk__in=[book.pk for book in self.books[2:5]]).update(created_at=created_at)
+
+    def get_pages(self, sort):
+        ids, cursor = [], ''
+        while cursor is not None:
+            request = Request(RequestFactory().get('/api/v1/book/', {'cursor': cursor, 'sort': sort}))
+            pagination = CursorPagination(Book.objects.all(), request, page_size=2)
+            ids.extend(book.pk for book in pagination.get_result())
+            cursor = pagination.get_next_cursor()
+        return ids
+
+    def test_ascending_round_trip(self):
+        expected = list(Book.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(self.get_pages('created_at'), expected)
+
+    def test_descending_round_trip(self):
+        expected = list(Book.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.get_pages('-created_at'), expected)
+
+    def test_cursor_of_another_sort_is_rejected(self):
+        request = Request(RequestFactory().get('/api/v1/book/', {'cursor': '', 'sort': 'created_at'}))
+        cursor = CursorPagination(Book.objects.all(), request, page_size=2).get_next_cursor()
+
+        request = Request(RequestFactory().get('/api/v1/book/', {'cursor': cursor, 'sort': '-created_at'}))
+        with self.assertRaises(serializers.ValidationError) as context:
+            CursorPagination(Book.objects.all(), request, page_size=2)
+        self.assertIn('cursor', context.exception.detail)
+
+
+class BookFlatSerializerTest(TestCase):
+    def setUp(self):
+        self.books = create_books(4)
+        self.books[1].prerequisite.add(self.books[0])
+        self.books[2].prerequisite.add(self.books[0], self.books[1])
+        self.customer = create_customer()
+        self.assertTrue(LoanService(self.customer).loan([self.books[0].pk])[0].success)
+
+    def render(self, serializer_class, objects, query_params):
+        request = Request(RequestFactory().get('/api/v1/book/', query_params))
+        request.user = self.customer
+        return json.dumps(serializer_class(objects, many=True, context={'request': request}).data)
+
+    def test_renders_the_output_of_book_serializer(self):
+        for query_params in ({}, {'fields': 'id,genre,prerequisite'}, {'exclude': 'author,loan_status'}):
+            field_names = BookSerializer.get_requested_field_names(
+                Request(RequestFactory().get('/', query_params)), BookSerializer.Meta.fields)
+            rows = Book.objects.order_by('id').values(*BookFlatSerializer.get_values_fields(field_names))
+            with self.subTest(query_params=query_params):
+                self.assertEqual(
+                    self.render(BookFlatSerializer, rows, query_params),
+                    self.render(BookSerializer, Book.objects.order_by('id'), query_params),
+                )
+
+
+class LoanServiceTest(TestCase):
+    def test_an_active_loan_row_fails_only_its_book(self):
+        stray_book, book = create_books(2)
+        customer, other_customer = create_customer(0), create_customer(1)
+        self.assertTrue(LoanService(other_customer).loan([stray_book.pk])[0].success)
+        # The book was released by hand while its loan row stayed active.
+        Book.objects.filter(pk=stray_book.pk).update(state='released')
+
+        stray_result, result = LoanService(customer).loan([stray_book.pk, book.pk])
+
+        self.assertEqual(stray_result.error, errors.THE_BOOK_IS_ALREADY_LOANED)
+        self.assertTrue(result.success)
+        self.assertTrue(BookLoanHistory.objects.filter(book=book, customer=customer, state='loaned').exists())
+
+    def test_a_customer_can_loan_a_book_again_one_loan_period_after_its_back_date(self):
+        book = create_books(1)[0]
+        customer = create_customer()
+        self.assertTrue(LoanService(customer).loan([book.pk])[0].success)
+        self.assertTrue(LoanService(customer).back([book.pk])[0].success)
+
+        self.assertFalse(LoanService(customer).loan([book.pk])[0].success)
+
+        BookLoanHistory.objects.filter(book=book).update(
+            back_date=datetime.date.today() - datetime.timedelta(BookLoanHistory.LOAN_DAYS))
+        self.assertTrue(LoanService(customer).loan([book.pk])[0].success)
+
+
+class LoanServiceConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.book = create_books(1)[0]
+        self.customers = [create_customer(index) for index in range(8)]
+
+    def test_concurrent_loans_of_a_book_have_one_winner(self):
+        barrier = threading.Barrier(len(self.customers))
+        results = []
+
+        def loan(customer):
+            try:
+                barrier.wait()
+                results.append(LoanService(customer).loan([self.book.pk])[0])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=loan, args=(customer,)) for customer in self.customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len([result for result in results if result.success]), 1)
+        self.assertEqual(
+            {result.error['code'] for result in results if not result.success},
+            {errors.THE_BOOK_IS_ALREADY_LOANED['code']},
+        )
+        self.assertEqual(Book.objects.get(pk=self.book.pk).state, 'loaned')
+        self.assertEqual(BookLoanHistory.objects.filter(book=self.book, state='loaned').count(), 1)
+
+    def test_stale_returns_do_not_release_the_next_loan(self):
+        customer, waiting_customer = self.customers[:2]
+        self.assertTrue(LoanService(customer).loan([self.book.pk])[0].success)
+        BookHold.objects.create(book=self.book, customer=waiting_customer)
+        barrier = threading.Barrier(4)
+        results = []
+
+        def back():
+            try:
+                barrier.wait()
+                results.append(LoanService(customer).back([self.book.pk])[0])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=back) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len([result for result in results if result.success]), 1)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).state, 'loaned')
+        self.assertTrue(BookLoanHistory.objects.filter(
+            book=self.book, customer=waiting_customer, state='loaned').exists())
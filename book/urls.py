@@ -7,16 +7,39 @@ urlpatterns = [
         path('', views.BookView.as_view({
             'get': 'list',
         })),
+        path('eligibility', views.BookView.as_view({
+            'post': 'eligibility',
+        })),
+        path('export', views.BookView.as_view({
+            'get': 'export',
+        })),
+        path('loan', views.BookView.as_view({
+            'put': 'bulk_loan',
+            'delete': 'bulk_back',
+        })),
 
         path('<int:pk>/', include([
             path('', views.BookView.as_view({
                 'get': 'retrieve',
 
             })),
+            path('prerequisites', views.BookView.as_view({
+                'get': 'prerequisites',
+            })),
             path('loan', views.BookView.as_view({
                 'put': 'loan',
                 'delete': 'back'
             })),
+            path('availability', views.BookView.as_view({
+                'get': 'availability',
+            })),
+            path('reservation', views.BookView.as_view({
+                'post': 'reserve',
+            })),
+            path('hold', views.BookView.as_view({
+                'put': 'hold',
+                'delete': 'unhold',
+            })),
 
         ])),
     ]))]
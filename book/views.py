@@ -1,17 +1,41 @@
+import datetime
+
+from django.db import IntegrityError
+from django.db.transaction import atomic
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
-from django_fsm import can_proceed
 from rest_framework import status
 
 from common.auth import JWTTokenAuthentication
 from common.permissions import IsAuthenticatedCustomer
 from common.response import ErrorResponse, Response
 from common.views import PaginatedViewSet
+from users.models import Customer
 from . import serializers, errors
 from .models import (
     Book,
+    BookHold,
     BookLoanHistory,
+    BookReservation,
+)
+from .exporters import BookExporter
+from .loans import LoanService
+from .resolvers import LoanStatusResolver
+from .swagger import (
+    book_list,
+    book_retrieve,
+    book_back,
+    book_loan,
+    book_bulk_loan,
+    book_bulk_back,
+    book_hold,
+    book_unhold,
+    book_availability,
+    book_reserve,
+    book_prerequisites,
+    book_eligibility,
+    book_export,
 )
-from .swagger import book_list, book_retrieve, book_back, book_loan
 
 
 class BookView(PaginatedViewSet):
@@ -19,67 +43,226 @@ class BookView(PaginatedViewSet):
     permission_classes = [IsAuthenticatedCustomer, ]
     serializer_class = serializers.BookSerializer
     single_serializer_class = serializers.BookSingleSerializer
+    cache_model = Book
+    cache_private_fields = ('loan_status',)
 
     def get_queryset(self, request):
         return Book.get_all()
 
+    def get_list_queryset(self, request):
+        field_names = self.serializer_class.get_requested_field_names(request, self.serializer_class.Meta.fields)
+        values_fields = serializers.BookFlatSerializer.get_values_fields(field_names)
+        # Cursors are read from the rows, so they carry the sort keys too.
+        values_fields.extend(field for field in Book.get_sortable_fields() if field not in values_fields)
+        return super().get_list_queryset(request).values(*values_fields)
+
+    def get_list_serializer_class(self, request):
+        return serializers.BookFlatSerializer
+
+    def additional_context_params(self, request):
+        return {
+            'loan_status_resolver': LoanStatusResolver.from_request(request),
+        }
+
+    def resolve_private_fields(self, request, items):
+        resolver = LoanStatusResolver.from_request(request)
+        if resolver:
+            resolver.add_ids(item['id'] for item in items)
+        for item in items:
+            item['loan_status'] = serializers.BookSerializer.get_loan_status_data(resolver, item['id'])
+
+    def get_private_etag(self, request):
+        if not isinstance(request.user, Customer):
+            return ''
+        # Loan statuses are rendered for the book and its prerequisites.
+        if not self.serializer_class.get_requested_field_names(request, ('loan_status', 'prerequisite')):
+            return ''
+        return BookLoanHistory.get_customer_loan_signature(request.user)
+
     @method_decorator(name='list', decorator=book_list)
     def list(self, request):
         return super().list(request)
 
     @method_decorator(name='retrieve', decorator=book_retrieve)
     def retrieve(self, request, pk=None):
-        if not BookLoanHistory.objects.filter(book__id=pk, state='loaned', customer__id=request.user.pk).exists():
+        # Loans past their back date deny access before the sweeper expires them.
+        if not BookLoanHistory.objects.filter(
+                book__id=pk,
+                state='loaned',
+                customer__id=request.user.pk,
+                back_date__gte=datetime.date.today(),
+        ).exists():
             return self.not_found(request)
         return super().retrieve(request, pk)
 
-    @method_decorator(name='loan', decorator=book_loan)
-    def loan(self, request, pk):
+    @method_decorator(name='prerequisites', decorator=book_prerequisites)
+    def prerequisites(self, request, pk):
         book = self.get_object(request, pk)  # type: Book
         if not book:
-            return ErrorResponse(errors.THERE_IS_NOT_ANY_BOOK)
+            return self.not_found(request)
 
-        book_loan_history, _ = BookLoanHistory.objects.get_or_create(
-            customer=request.user,
-            book=book,
-            defaults={
-                'customer': request.user,
-                'book': book,
+        query_serializer = serializers.PrerequisiteTreeQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return self.data_not_valid(request, query_serializer.errors)
 
-            }
-        )
+        return Response(data=serializers.PrerequisiteTreeSerializer(
+            Book.get_prerequisite_tree(book, query_serializer.validated_data.get('depth')),
+            many=True,
+            context=self.get_context(request)
+        ).data)
+
+    @method_decorator(name='eligibility', decorator=book_eligibility)
+    def eligibility(self, request):
+        request_serializer = serializers.BookIdsRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return self.data_not_valid(request, request_serializer.errors)
 
-        if not can_proceed(book_loan_history.loan):
+        return Response(data=serializers.BookEligibilitySerializer(
+            LoanService(request.user).check(request_serializer.validated_data['books']),
+            many=True,
+            context=self.get_context(request)
+        ).data)
+
+    @method_decorator(name='export', decorator=book_export)
+    def export(self, request):
+        query_serializer = serializers.BookExportQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return self.data_not_valid(request, query_serializer.errors)
+
+        exporter = BookExporter(query_serializer.validated_data['output'], self.get_queryset(request))
+        response = StreamingHttpResponse(exporter.stream(), content_type=exporter.content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(exporter.file_name)
+        return response
+
+    @method_decorator(name='loan', decorator=book_loan)
+    def loan(self, request, pk):
+        result = LoanService(request.user).loan([pk])[0]
+        if result.error in (errors.THERE_IS_NOT_ANY_BOOK, errors.THE_BOOK_IS_ALREADY_LOANED,
+                            errors.THE_BOOK_IS_RESERVED):
+            return ErrorResponse(result.error)
+
+        if not result.success:
+            book_loan_history = result.loan_history
             return ErrorResponse(
-                errors.THE_BOOK_IS_NOT_RELEASED,
-                errors=f" book status is {book.state} "
+                result.error,
+                errors=f" book status is {book_loan_history.book.state} "
                        f"and current user loan history status is {book_loan_history.state} "
-                       f"and user prerequisite is {book_loan_history.has_prerequisite_permission()}"
-
+                       f"and user prerequisite is {book_loan_history.user_has_prerequisite_permission()}",
+                extra_data={
+                    'missing_prerequisites': result.get_missing_prerequisites(),
+                }
             )
-        book_loan_history.loan()
-        book_loan_history.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @method_decorator(name='back', decorator=book_back)
     def back(self, request, pk):
-        book = self.get_object(request, pk)  # type: Book
-        if not book:
+        result = LoanService(request.user).back([pk])[0]
+        if result.error is errors.THERE_IS_NOT_ANY_BOOK:
             return ErrorResponse(errors.THERE_IS_NOT_ANY_BOOK)
-        book_loan_history, _ = BookLoanHistory.objects.get_or_create(
-            customer=request.user,
-            book=book,
-            defaults={
-                'customer': request.user,
-                'book': book,
-            }
-        )
-        if not can_proceed(book_loan_history.back):
+
+        if not result.success:
+            book_loan_history = result.loan_history
             return ErrorResponse(
-                errors.THE_BOOK_IS_RELEASED,
-                errors=f" book status is {book.state} and current user loan history status"
+                result.error,
+                errors=f" book status is {book_loan_history.book.state} and current user loan history status"
                        f" is {book_loan_history.state}"
             )
-        book_loan_history.back()
-        book_loan_history.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @method_decorator(name='hold', decorator=book_hold)
+    def hold(self, request, pk):
+        book = Book.get_by_pk(pk)
+        if not book:
+            return ErrorResponse(errors.THERE_IS_NOT_ANY_BOOK)
+        if book.state != 'loaned':
+            return ErrorResponse(errors.THE_BOOK_IS_NOT_LOANED)
+        # The hand-off would skip the borrower's own hold, see `user_did_not_loan_book_last`.
+        if BookLoanHistory.objects.filter(book=book, customer=request.user, state='loaned').exists():
+            return ErrorResponse(errors.THE_BOOK_IS_LOANED_BY_THE_USER)
+
+        try:
+            with atomic():
+                book_hold = BookHold.objects.create(book=book, customer=request.user)
+        except IntegrityError:
+            return ErrorResponse(errors.THE_BOOK_IS_ALREADY_HELD)
+        return Response(
+            data=serializers.BookHoldSerializer(book_hold, context=self.get_context(request)).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @method_decorator(name='unhold', decorator=book_unhold)
+    def unhold(self, request, pk):
+        book_hold = BookHold.get_waiting_hold(request.user, pk)
+        if not book_hold:
+            return ErrorResponse(errors.THERE_IS_NOT_ANY_HOLD)
+
+        book_hold.cancel()
+        book_hold.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @method_decorator(name='availability', decorator=book_availability)
+    def availability(self, request, pk):
+        book = self.get_object(request, pk)  # type: Book
+        if not book:
+            return self.not_found(request)
+
+        query_serializer = serializers.BookAvailabilityQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return self.data_not_valid(request, query_serializer.errors)
+
+        return Response(data=serializers.BookAvailabilitySerializer(
+            BookReservation.get_free_windows(
+                book.pk,
+                query_serializer.validated_data['start'],
+                query_serializer.validated_data['end'],
+            ),
+            many=True,
+            context=self.get_context(request)
+        ).data)
+
+    @method_decorator(name='reserve', decorator=book_reserve)
+    def reserve(self, request, pk):
+        book = self.get_object(request, pk)  # type: Book
+        if not book:
+            return self.not_found(request)
+
+        request_serializer = serializers.BookReservationRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return self.data_not_valid(request, request_serializer.errors)
+
+        try:
+            with atomic():
+                book_reservation = BookReservation.reserve(
+                    book, request.user, request_serializer.validated_data['start_date'])
+        except IntegrityError:
+            return ErrorResponse(errors.THE_BOOK_IS_ALREADY_RESERVED)
+        if not book_reservation:
+            return ErrorResponse(errors.THE_BOOK_IS_LOANED_IN_THIS_PERIOD)
+        return Response(
+            data=serializers.BookReservationSerializer(book_reservation, context=self.get_context(request)).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @method_decorator(name='bulk_loan', decorator=book_bulk_loan)
+    def bulk_loan(self, request):
+        request_serializer = serializers.BookIdsRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return self.data_not_valid(request, request_serializer.errors)
+
+        return Response(data=serializers.BookLoanResultSerializer(
+            LoanService(request.user).loan(request_serializer.validated_data['books']),
+            many=True,
+            context=self.get_context(request)
+        ).data)
+
+    @method_decorator(name='bulk_back', decorator=book_bulk_back)
+    def bulk_back(self, request):
+        request_serializer = serializers.BookIdsRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return self.data_not_valid(request, request_serializer.errors)
+
+        return Response(data=serializers.BookLoanResultSerializer(
+            LoanService(request.user).back(request_serializer.validated_data['books']),
+            many=True,
+            context=self.get_context(request)
+        ).data)
@@ -0,0 +1,44 @@
+import socket
+import time
+
+from django.core.cache import cache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+
+# django-redis re-raises the client's own error unless it ignores exceptions.
+CACHE_ERRORS = (ConnectionInterrupted, RedisError, socket.timeout)
+
+
+def _get_version_key(model):
+    return 'version:{}'.format(model._meta.label_lower)
+
+
+def get_model_version(model) -> int:
+    """
+    Version number of the model's data, part of the key of everything cached
+    from it so that bumping the version invalidates all of it at once. None
+    when the cache is unreachable, callers then skip caching.
+    """
+    key = _get_version_key(model)
+    try:
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock so a lost key never comes back as a version
+            # that was already handed out.
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key)
+    except CACHE_ERRORS:
+        return None
+    return version
+
+
+def bump_model_version(model):
+    key = _get_version_key(model)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+    except CACHE_ERRORS:
+        # Nothing can be read from the cache either, writes must not fail with it.
+        pass
@@ -0,0 +1,33 @@
+PERSIAN_CHARACTERS = {
+    'ك': 'ک',
+    'ى': 'ی',
+    'ي': 'ی',
+    '١': '۱',
+    '٢': '۲',
+    '٣': '۳',
+    '٤': '۴',
+    '٥': '۵',
+    '٦': '۶',
+    '٧': '۷',
+    '٨': '۸',
+    '٩': '۹',
+    '٠': '۰',
+    # kasra
+    'ِ': None,
+}
+
+PERSIAN_TRANSLATION_TABLE = str.maketrans(PERSIAN_CHARACTERS)
+
+
+def arabic_to_persian(word):
+    return word.translate(PERSIAN_TRANSLATION_TABLE)
+
+
+def normalize_search_text(word):
+    """
+    Normalized form stored in the `*_normalized` search columns and matched
+    against them: Persian characters and lower case.
+    """
+    if word is None:
+        return ''
+    return arabic_to_persian(word).lower()
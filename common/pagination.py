@@ -1,13 +1,26 @@
+import base64
+import binascii
 import copy
+import functools
+import hashlib
+import json
 import math
+import re
 from abc import abstractmethod
 
-from django.db import models
-from django.db.models import Q
-from rest_framework import status
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connection, models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework import serializers, status
 from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination as DefaultPageNumberPagination
 
+from common.cache import get_model_version
+from common.normalizers import arabic_to_persian, normalize_search_text
 from common.response import Response
 
 
@@ -26,13 +39,169 @@ class PaginationSortable:
 
 
 class PaginationSearchable:
+    SEARCH_MODE_CONTAINS = 'contains'
+    SEARCH_MODE_FULL_TEXT = 'fulltext'
+
     @classmethod
     @abstractmethod
     def get_searchable_fields(cls):
         return []
 
+    @classmethod
+    def get_search_vector_field(cls):
+        """
+        Name of a `SearchVectorField` kept in sync with the searchable fields,
+        required by the full-text search mode.
+        """
+        return None
+
+    @classmethod
+    def get_search_mode(cls):
+        return cls.SEARCH_MODE_CONTAINS
+
+    @classmethod
+    def get_normalized_fields(cls):
+        """
+        Maps searchable or filterable fields to shadow columns holding their
+        `normalize_search_text` form, substring lookups are run on those.
+        """
+        return {}
+
+    @classmethod
+    def get_fuzzy_searchable_fields(cls):
+        """
+        Fields matched by trigram similarity through the `fuzzy` query param,
+        each should have a `gin_trgm_ops` index.
+        """
+        return []
+
+
+class PaginationSpec(object):
+    """
+    Query param parsing tables of a model, compiled once per model and field
+    declarations: every accepted filter param with its ORM lookup and value
+    coercer, and every accepted sort key.
+    """
+    MULTIPLE_VALUE_LOOKUPS = ("__in",)
+
+    def __init__(self, model, filterable_fields, sortable_fields, search_fields, filterable_key_map):
+        self.normalized_fields = model.get_normalized_fields() if issubclass(model, PaginationSearchable) else {}
+
+        self.coercers = {}
+        for field_name in set(filterable_fields) | set(search_fields):
+            self.coercers[field_name] = self._get_coercer(self._get_field(model, field_name))
+
+        self.model_filters = {}
+        self.filters = {}
+        for field_name in filterable_fields:
+            model_filter = getattr(model, field_name, None)
+            if callable(model_filter):
+                self.model_filters[field_name] = model_filter
+
+            normalized_field = self.normalized_fields.get(field_name)
+            for prefix, lookup in filterable_key_map:
+                multiple = lookup in self.MULTIPLE_VALUE_LOOKUPS
+                if normalized_field and prefix == "filter__":
+                    self.filters[prefix + field_name] = (
+                        "{}__contains".format(normalized_field), normalize_search_text, multiple)
+                elif normalized_field and multiple:
+                    self.filters[prefix + field_name] = (
+                        "{}{}".format(normalized_field, lookup), normalize_search_text, multiple)
+                else:
+                    self.filters[prefix + field_name] = (
+                        "{}{}".format(field_name, lookup), self.coercers[field_name], multiple)
+
+        self.sort_keys = {}
+        for field_name in sortable_fields:
+            self.sort_keys[field_name] = field_name
+            self.sort_keys["+" + field_name] = field_name
+            self.sort_keys["-" + field_name] = "-" + field_name
+
+        self.sort_indexes = [((model._meta.pk.name, False),)]
+        for index in model._meta.indexes:
+            if type(index) is models.Index and index.fields and not index.condition and not index.opclasses:
+                self.sort_indexes.append(tuple(
+                    (field_name, order == 'DESC') for field_name, order in index.fields_orders
+                ))
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def compile(cls, model, filterable_fields, sortable_fields, search_fields, filterable_key_map):
+        return cls(model, filterable_fields, sortable_fields, search_fields, filterable_key_map)
+
+    def is_indexed_sort(self, sort_keys):
+        """
+        Whether some btree index of the model yields rows in `sort_keys` order,
+        that is the keys are a prefix of its columns scanned in one direction.
+        """
+        for index in self.sort_indexes:
+            if len(sort_keys) > len(index):
+                continue
+            reversed_scans = set()
+            for key, (field_name, descending) in zip(sort_keys, index):
+                if key.lstrip('-') != field_name:
+                    break
+                reversed_scans.add(key.startswith('-') != descending)
+            else:
+                if len(reversed_scans) == 1:
+                    return True
+        return False
+
+    @classmethod
+    def _get_field(cls, model, key):
+        split_key = key.split('__', 1)
+        if len(split_key) > 1:
+            return cls._get_field(model._meta.get_field(split_key[0]).related_model, split_key[1])
+        return model._meta.get_field(key)
+
+    @classmethod
+    def _get_coercer(cls, field):
+        if isinstance(field, (models.CharField, models.TextField)):
+            coerce = cls._coerce_text
+        elif isinstance(field, models.BooleanField):
+            coerce = cls._coerce_boolean
+        elif isinstance(field, (models.IntegerField, models.BigIntegerField, models.BigAutoField)):
+            coerce = cls._coerce_integer
+        elif isinstance(field, (models.FloatField, models.DecimalField)):
+            coerce = cls._coerce_float
+        else:
+            coerce = str
+
+        def coerce_value(value):
+            if value == 'null':
+                return None
+            return coerce(value)
+
+        return coerce_value
+
+    @staticmethod
+    def _coerce_text(value):
+        return arabic_to_persian(str(value))
+
+    @staticmethod
+    def _coerce_boolean(value):
+        return not (value.lower() == "false" or value == "0")
+
+    @staticmethod
+    def _coerce_integer(value):
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+
+    @staticmethod
+    def _coerce_float(value):
+        try:
+            return float(value)
+        except ValueError:
+            return 0.0
+
 
 class PageNumberPagination(object):
+    SEARCH_CONFIG = 'simple'
+    TIEBREAKER = 'id'
+    SEARCH_TERM_PATTERN = re.compile(r'\w+')
+
     FILTERABLE_KEY_MAP = {
         "filter__": "__icontains",
         "exact__": "",
@@ -40,6 +209,7 @@ class PageNumberPagination(object):
         "lte__": "__lte",
         "gt__": "__gt",
         "gte__": "__gte",
+        "in__": "__in",
     }
 
     def __init__(self, query_set, request, page_size=20, filterable_fields=None,
@@ -61,19 +231,73 @@ class PageNumberPagination(object):
             request.query_params.get('page', 1)) > 0 else 1
 
         self.search_text = self._request.query_params.get('search', None)
+        self.fuzzy_text = self._request.query_params.get('fuzzy', None)
+        self.fuzzy_threshold = None
         self.query_set = query_set
         self._update_query_set()
-        self.total_count = self.query_set.count()
 
+        self.default_page_size = page_size
         try:
             self.page_size = int(
                 self._request.query_params.get('page_size', page_size))
-        except ValueError as e:
+        except ValueError:
             self.page_size = page_size
 
+        self._init_pages()
+
+    def _init_pages(self):
+        self._result = None
+        self._has_next_page = False
+        if self._request.query_params.get('count', '').lower() in ('false', '0'):
+            self.total_count = None
+            self.page_count = None
+            return
+
+        self.total_count = self._count()
         self.page_count = int(math.ceil(
             self.total_count / self.page_size)) if self.page_size > 0 else 1
 
+    def _count(self):
+        """
+        Unfiltered querysets over large tables use the planner's row estimate,
+        everything else an exact count cached under the model's data version.
+        """
+        if not self.query_set.query.where:
+            estimate = self._estimate_count()
+            if estimate >= settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+
+        # `str(query)` pastes params in unquoted, so the key hashes them apart from
+        # the SQL. The fuzzy threshold changes what `%` matches but is not part of it.
+        try:
+            sql, params = self.query_set.order_by().query.sql_with_params()
+            count_query = '{}:{!r}:{}'.format(sql, params, self.fuzzy_threshold)
+        except EmptyResultSet:
+            # Conditions that can match nothing, like a search without any term.
+            return 0
+        version = get_model_version(self.query_set.model)
+        if version is None:
+            return self.query_set.count()
+        key = 'pagination:count:{}:{}:{}'.format(
+            self.query_set.model._meta.label_lower,
+            version,
+            hashlib.md5(count_query.encode()).hexdigest(),
+        )
+        total_count = cache.get(key)
+        if total_count is None:
+            total_count = self.query_set.count()
+            cache.set(key, total_count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return total_count
+
+    def _estimate_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [self.query_set.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row and row[0] > 0 else 0
+
     def _update_query_set(self):
         if self.filterable_fields is None and issubclass(self.query_set.model,
                                                          PaginationFilterable):
@@ -96,15 +320,31 @@ class PageNumberPagination(object):
         if self.search_fields is None:
             self.search_fields = []
 
+        self.spec = PaginationSpec.compile(
+            self.query_set.model,
+            tuple(self.filterable_fields),
+            tuple(self.sortable_fields),
+            tuple(self.search_fields),
+            tuple(self.FILTERABLE_KEY_MAP.items()),
+        )
+
         for value in self._get_filter_kwargs_list():
             self.query_set = self.query_set.filter(**value)
 
-        if self.search_text:
+        if self.search_text and self._get_search_mode() == PaginationSearchable.SEARCH_MODE_FULL_TEXT:
+            self._full_text_search()
+
+        elif self.search_text:
             or_query = None
             for field in self.search_fields:
-                q = Q(**{'{}__icontains'.format(field):
-                             self._get_value(field, self.search_text)}
-                      )
+                normalized_field = self._get_normalized_field(field)
+                if normalized_field:
+                    q = Q(**{'{}__contains'.format(normalized_field):
+                                 normalize_search_text(self.search_text)})
+                else:
+                    q = Q(**{'{}__icontains'.format(field):
+                                 self.spec.coercers[field](self.search_text)}
+                          )
                 if or_query:
                     or_query = or_query | q
                 else:
@@ -112,103 +352,138 @@ class PageNumberPagination(object):
             if or_query:
                 self.query_set = self.query_set.filter(or_query)
 
-        for value in self._get_sort_list():
-            self.query_set = self.query_set.order_by(value)
-
-    def _get_filter_kwargs_list(self):
-        for key, value in self._request.query_params.items():
-            if key in self.filterable_fields:
-                if hasattr(self.query_set.model, key):
-                    query_kwarg = getattr(self.query_set.model, key)(value)
-                    if isinstance(query_kwarg, dict):
-                        yield query_kwarg
-                    continue
-
-            for k, v in self.FILTERABLE_KEY_MAP.items():
-                if key.startswith(k):
-                    new_key = key.replace(k, "", 1)
-                    if new_key in self.filterable_fields:
-                        yield {
-                            "{}{}".format(new_key, v): self._get_value(new_key,
-                                                                       value)
-                        }
-
-    def _get_value(self, key, value, model=None):
-
-        meta = model._meta if model else self.query_set.model._meta
-        split_ket = key.split('__', 1)
-        if len(split_ket) > 1:
-            model = meta.get_field(split_ket[0]).related_model
-            return self._get_value(split_ket[1], value, model)
-
-        field = meta.get_field(key)
+        if self.fuzzy_text:
+            self._fuzzy_search()
+
+        sort_keys = self._get_sort_keys()
+        if sort_keys:
+            self.query_set = self.query_set.order_by(*sort_keys)
+        elif not self.query_set.ordered:
+            self.query_set = self.query_set.order_by(self.TIEBREAKER)
+
+    def _get_normalized_field(self, field):
+        return self.spec.normalized_fields.get(field)
+
+    def _get_search_mode(self):
+        model = self.query_set.model
+        if not issubclass(model, PaginationSearchable) or not model.get_search_vector_field():
+            return PaginationSearchable.SEARCH_MODE_CONTAINS
+
+        search_mode = self._request.query_params.get('search_mode', model.get_search_mode())
+        if search_mode not in (PaginationSearchable.SEARCH_MODE_CONTAINS,
+                               PaginationSearchable.SEARCH_MODE_FULL_TEXT):
+            return model.get_search_mode()
+        return search_mode
+
+    def _full_text_search(self):
+        terms = self.SEARCH_TERM_PATTERN.findall(normalize_search_text(self.search_text))
+        if not terms:
+            self.query_set = self.query_set.none()
+            return
+
+        vector_field = self.query_set.model.get_search_vector_field()
+        search_query = SearchQuery(
+            ' & '.join('{}:*'.format(term) for term in terms),
+            config=self.SEARCH_CONFIG,
+            search_type='raw',
+        )
+        self.query_set = self.query_set.filter(**{
+            vector_field: search_query,
+        }).annotate(
+            search_rank=SearchRank(F(vector_field), search_query),
+        ).order_by('-search_rank', 'id')
 
-        if value == 'null':
-            return None
+    def _get_fuzzy_threshold(self):
+        try:
+            threshold = float(self._request.query_params.get(
+                'fuzzy_threshold', settings.PAGINATION_FUZZY_THRESHOLD))
+        except ValueError:
+            return settings.PAGINATION_FUZZY_THRESHOLD
+        return min(max(threshold, 0.0), 1.0)
+
+    def _fuzzy_search(self):
+        model = self.query_set.model
+        fields = model.get_fuzzy_searchable_fields() if issubclass(model, PaginationSearchable) else []
+        if not fields:
+            return
+
+        text = normalize_search_text(self.fuzzy_text)
+        self.fuzzy_threshold = self._get_fuzzy_threshold()
+
+        # The `%` operator behind `trigram_similar` is what the trigram indexes
+        # serve, and it compares against this setting. It is set local to the
+        # current transaction, so the queries of the page must run in one.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(self.fuzzy_threshold)])
+
+        condition = Q()
+        similarities = []
+        for field in fields:
+            condition |= Q(**{'{}__trigram_similar'.format(field): text})
+            similarities.append(TrigramSimilarity(field, text))
+
+        self.query_set = self.query_set.filter(condition).annotate(
+            search_similarity=Greatest(*similarities) if len(similarities) > 1 else similarities[0],
+        ).order_by('-search_similarity', 'id')
 
-        if isinstance(field, (models.CharField, models.TextField)):
-            return self._arabic_to_persian(str(value))
-
-        if isinstance(field, models.BooleanField):
-            if value.lower() == "false" or value == "0":
-                return False
-            return True
-
-        if isinstance(field, (
-                models.IntegerField, models.BigIntegerField,
-                models.BigAutoField)):
-            try:
-                return int(value)
-            except ValueError as e:
-                return 0
-
-        if isinstance(field, (models.FloatField, models.DecimalField)):
-            try:
-                return float(value)
-            except ValueError as e:
-                return 0.0
-
-        return value
-
-    def _arabic_to_persian(self, word):
-        characters = {
-            'ك': 'ک',
-            'دِ': 'د',
-            'بِ': 'ب',
-            'زِ': 'ز',
-            'ذِ': 'ذ',
-            'شِ': 'ش',
-            'سِ': 'س',
-            'ى': 'ی',
-            'ي': 'ی',
-            '١': '۱',
-            '٢': '۲',
-            '٣': '۳',
-            '٤': '۴',
-            '٥': '۵',
-            '٦': '۶',
-            '٧': '۷',
-            '٨': '۸',
-            '٩': '۹',
-            '٠': '۰',
-        }
-        for k, v in characters.items():
-            word = word.replace(k, v)
-        return word
+    def _get_filter_kwargs_list(self):
+        for key, values in self._request.query_params.lists():
+            model_filter = self.spec.model_filters.get(key)
+            if model_filter:
+                query_kwarg = model_filter(values[-1])
+                if isinstance(query_kwarg, dict):
+                    yield query_kwarg
+                continue
+
+            param_filter = self.spec.filters.get(key)
+            if param_filter:
+                lookup, coerce, multiple = param_filter
+                if multiple:
+                    value = [coerce(item) for value in values for item in value.split(',') if item]
+                else:
+                    value = coerce(values[-1])
+                yield {lookup: value}
 
     def _get_sort_list(self):
-        sort_field = []
-
         request_sort = self._request.query_params.get('sort')
         if not request_sort:
-            return sort_field
+            return
 
         for item in request_sort.split(","):
-            if item.replace("-", "", 1).replace("+", "",
-                                                1) in self.sortable_fields:
-                yield item
+            if item in self.spec.sort_keys:
+                yield self.spec.sort_keys[item]
+
+    def _get_sort_keys(self):
+        """
+        Requested sort keys followed by the `id` tiebreaker in the direction of
+        the last key, so one index scan serves the whole order. Unless
+        `PAGINATION_REQUIRE_INDEXED_SORT` is off, orders no index can serve are
+        rejected instead of being sorted in memory.
+        """
+        sort_keys = []
+        for key in self._get_sort_list():
+            if key.lstrip('-') not in [sort_key.lstrip('-') for sort_key in sort_keys]:
+                sort_keys.append(key)
+        if not sort_keys:
+            return sort_keys
+
+        if self.TIEBREAKER not in [key.lstrip('-') for key in sort_keys]:
+            sort_keys.append('-' + self.TIEBREAKER if sort_keys[-1].startswith('-') else self.TIEBREAKER)
+
+        if settings.PAGINATION_REQUIRE_INDEXED_SORT and not self.spec.is_indexed_sort(sort_keys):
+            raise serializers.ValidationError({'sort': ['Sorting by {} is not supported.'.format(
+                self._request.query_params.get('sort'))]})
+        return sort_keys
 
     def get_result(self):
+        if self.total_count is None and self.page_size > 0:
+            if self._result is None:
+                offset = (self.current_page - 1) * self.page_size
+                self._result = list(self.query_set[offset:offset + self.page_size + 1])
+                self._has_next_page = len(self._result) > self.page_size
+                self._result = self._result[:self.page_size]
+            return self._result
         if self.page_size > 0:
             return self.query_set[(
                                           self.current_page - 1) * self.page_size:self.page_size * self.current_page]
@@ -218,9 +493,14 @@ class PageNumberPagination(object):
         return self.total_count
 
     def get_last_page(self):
+        if self.page_count is None:
+            return None
         return self.page_count if self.page_count > 0 else 1
 
     def has_next_page(self):
+        if self.page_count is None:
+            self.get_result()
+            return self._has_next_page
         return self.current_page < self.get_last_page()
 
     def has_prev_page(self):
@@ -238,7 +518,7 @@ class PageNumberPagination(object):
         return 1
 
     def get_pagination_headers(self):
-        return {
+        headers = {
             "X-Pagination-Total-Count": self.get_total_count(),
             "X-Pagination-Page-Count": self.get_last_page(),
             "X-Pagination-Current-Page": self.current_page,
@@ -248,6 +528,7 @@ class PageNumberPagination(object):
             "X-Pagination-Searchable-Fields": ",".join(self.search_fields),
             "Link": self.get_links()
         }
+        return {key: value for key, value in headers.items() if value is not None}
 
     def get_links(self):
 
@@ -289,14 +570,149 @@ class PageNumberPagination(object):
                 "rel": "next",
             })
 
-        links.append({
-            "page_number": self.get_last_page(),
-            "rel": "last",
-        })
+        if self.get_last_page() is not None:
+            links.append({
+                "page_number": self.get_last_page(),
+                "rel": "last",
+            })
 
         return ", ".join([get_link(link) for link in links])
 
 
+class CursorPagination(PageNumberPagination):
+    """
+    Keyset pagination: the `cursor` query param carries the sort key values of
+    the last row of the previous page, and the next page is read with a range
+    condition on those keys instead of an OFFSET. An empty `cursor` starts at
+    the first page. Rows are ordered by the requested `sort` keys followed by
+    `id`, ranking orders of search modes do not apply.
+    """
+    def _init_pages(self):
+        if self.page_size <= 0:
+            self.page_size = self.default_page_size
+        self.sort_keys = self._get_cursor_sort_keys()
+        self.query_set = self.query_set.order_by(*self.sort_keys)
+
+        cursor = self._request.query_params.get('cursor', None)
+        if cursor:
+            self.query_set = self.query_set.filter(self._get_cursor_condition(self._decode_cursor(cursor)))
+
+        self._result = None
+        self._has_next_page = False
+
+    def _get_cursor_sort_keys(self):
+        return self._get_sort_keys() or [self.TIEBREAKER]
+
+    def _get_sort_field(self, key, model=None):
+        meta = model._meta if model else self.query_set.model._meta
+        split_key = key.split('__', 1)
+        if len(split_key) > 1:
+            return self._get_sort_field(split_key[1], meta.get_field(split_key[0]).related_model)
+        return meta.get_field(key)
+
+    def _get_cursor_condition(self, values):
+        """
+        Rows after the cursor. Keys sorted in one direction, as indexed sorts
+        are, compare as one row so the index range scan starts at the cursor;
+        mixed directions expand to an OR bounded by the leading key.
+        """
+        fields = [key.lstrip('-') for key in self.sort_keys]
+        descending = {key.startswith('-') for key in self.sort_keys}
+        if len(descending) == 1:
+            return models.Func(
+                models.Func(*[F(field) for field in fields], function='ROW'),
+                models.Func(*[models.Value(value) for value in values], function='ROW'),
+                template='%(expressions)s',
+                arg_joiner=' < ' if descending.pop() else ' > ',
+                output_field=models.BooleanField(),
+            )
+
+        condition = Q(pk__in=[])
+        equal = Q()
+        for key, value in zip(self.sort_keys, values):
+            field = key.lstrip('-')
+            lookup = '{}__lt' if key.startswith('-') else '{}__gt'
+            condition |= equal & Q(**{lookup.format(field): value})
+            equal &= Q(**{field: value})
+        lookup = '{}__lte' if self.sort_keys[0].startswith('-') else '{}__gte'
+        return Q(**{lookup.format(fields[0]): values[0]}) & condition
+
+    def _encode_cursor(self, obj):
+        values = []
+        for key in self.sort_keys:
+            if isinstance(obj, dict):
+                value = obj[key.lstrip('-')]
+            else:
+                value = obj
+                for attribute in key.lstrip('-').split('__'):
+                    value = getattr(value, attribute)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        data = json.dumps({'sort': self.sort_keys, 'values': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def _decode_cursor(self, cursor):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if data['sort'] != self.sort_keys or len(data['values']) != len(self.sort_keys):
+                raise ValueError(cursor)
+            return [
+                self._get_sort_field(key.lstrip('-')).to_python(value)
+                for key, value in zip(self.sort_keys, data['values'])
+            ]
+        except (ValueError, TypeError, KeyError, binascii.Error, ValidationError):
+            raise serializers.ValidationError({'cursor': ['The cursor is not valid for this query.']})
+
+    def get_result(self):
+        if self._result is None:
+            self._result = list(self.query_set[:self.page_size + 1])
+            self._has_next_page = len(self._result) > self.page_size
+            self._result = self._result[:self.page_size]
+        return self._result
+
+    def has_next_page(self):
+        self.get_result()
+        return self._has_next_page
+
+    def get_next_cursor(self):
+        if self.has_next_page():
+            return self._encode_cursor(self._result[-1])
+
+    def get_pagination_headers(self):
+        return {
+            "X-Pagination-Per-Page": self.page_size,
+            "X-Pagination-Sortable-Fields": ",".join(self.sortable_fields),
+            "X-Pagination-Filterable-Fields": ",".join(self.filterable_fields),
+            "X-Pagination-Searchable-Fields": ",".join(self.search_fields),
+            "Link": self.get_links()
+        }
+
+    def get_links(self):
+        url = "{0}://{1}{2}".format(
+            self._request.scheme,
+            self._request.get_host(),
+            self._request.path,
+        )
+
+        def get_link(cursor, rel):
+            query_params = copy.copy(self._request.query_params)
+            query_params._mutable = True
+            query_params['cursor'] = cursor
+            return "<{rout}?{query_params}>; rel={rel}".format(
+                rout=url,
+                query_params=query_params.urlencode(safe="/"),
+                rel=rel
+            )
+
+        links = [
+            get_link('', 'first'),
+            get_link(self._request.query_params.get('cursor', ''), 'self'),
+        ]
+        if self.has_next_page():
+            links.append(get_link(self.get_next_cursor(), 'next'))
+
+        return ", ".join(links)
+
+
 class CustomPaginator(DefaultPageNumberPagination):
     def __init__(self, page_size):
         self.page_size = page_size
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 from rest_framework import serializers
 
 
@@ -6,4 +8,35 @@ class BaseSerializer(serializers.Serializer):
 
 
 class BaseModelSerializer(serializers.ModelSerializer):
-    pass
+    """
+    The root serializer of a response renders only the top-level fields
+    selected by the comma separated `fields` and `exclude` query params of
+    the request in its context. Serializers given `data` validate all their
+    fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.root is not self and self.root is not self.parent:
+            return fields
+        if hasattr(self.root, 'initial_data'):
+            return fields
+
+        field_names = self.get_requested_field_names(self.context.get('request', None), fields.keys())
+        return OrderedDict((field_name, fields[field_name]) for field_name in field_names)
+
+    @classmethod
+    def get_requested_field_names(cls, request, field_names) -> list:
+        query_params = getattr(request, 'query_params', {})
+        fields = cls._split_field_names(query_params.get('fields', None))
+        exclude = cls._split_field_names(query_params.get('exclude', None))
+        return [
+            field_name for field_name in field_names
+            if (not fields or field_name in fields) and field_name not in exclude
+        ]
+
+    @staticmethod
+    def _split_field_names(value):
+        if not value:
+            return set()
+        return {field_name.strip() for field_name in value.split(',') if field_name.strip()}
@@ -1,3 +1,11 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.transaction import atomic
+from django.utils.cache import parse_etags
+from django.utils.http import urlencode
 from rest_framework import exceptions
 from rest_framework import serializers
 from rest_framework import status
@@ -6,7 +14,8 @@ from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSetMixin
 
 from common import errors
-from common.pagination import PageNumberPagination
+from common.cache import get_model_version
+from common.pagination import CursorPagination, PageNumberPagination
 from common.response import ErrorResponse, Response
 
 
@@ -71,6 +80,12 @@ class BaseViewSet(ViewSetMixin, BaseAPIView):
     serializer_class = None
     single_serializer_class = None
     url_params = []
+    # Model whose data version keys the cached list and retrieve responses,
+    # caching is off without it.
+    cache_model = None
+    # Per-user fields of the serialized data, stored empty and filled in by
+    # `resolve_private_fields` on every cache hit.
+    cache_private_fields = ()
 
     @property
     def _single_serializer_class(self):
@@ -121,14 +136,22 @@ class BaseViewSet(ViewSetMixin, BaseAPIView):
         return self.get_queryset(request).filter(pk=pk).first()
 
     def retrieve(self, request, pk=None):
+        return self.get_conditional_response(request, self.get_retrieve_response, pk)
+
+    def get_retrieve_response(self, request, pk=None):
+        response = self.get_cached_response(request)
+        if response is not None:
+            return response
+
         obj = self.get_object(request, pk)
         if not obj:
             return self.not_found(request)
 
-        return Response(
-            data=self._single_serializer_class(obj,
-                                               context=self.get_context(
-                                                   request)).data)
+        data = self._single_serializer_class(obj,
+                                             context=self.get_context(
+                                                 request)).data
+        self.cache_response(request, data)
+        return Response(data=data)
 
     def update(self, request, pk=None):
         obj = self.get_object(request, pk)
@@ -197,6 +220,102 @@ class BaseViewSet(ViewSetMixin, BaseAPIView):
         context.update(self.additional_context_params(request))
         return context
 
+    def get_response_cache_key(self, request):
+        if self.cache_model is None:
+            return None
+        version = get_model_version(self.cache_model)
+        if version is None:
+            return None
+
+        query_params = urlencode(sorted(
+            (key, value) for key, values in request.query_params.lists() for value in values
+        ))
+        url = "{0}://{1}{2}?{3}".format(request.scheme, request.get_host(), request.path, query_params)
+        return 'response:{}:{}:{}'.format(
+            self.cache_model._meta.label_lower,
+            version,
+            hashlib.md5(url.encode()).hexdigest(),
+        )
+
+    def get_etag(self, request):
+        """
+        Strong ETag of the list and retrieve responses: the response cache key,
+        which carries the data version, plus the negotiated media type and the
+        `get_private_etag` part of the current user.
+        """
+        cache_key = self.get_response_cache_key(request)
+        if not cache_key:
+            return None
+
+        value = '{}:{}:{}'.format(
+            cache_key,
+            getattr(request, 'accepted_media_type', ''),
+            self.get_private_etag(request),
+        )
+        return '"{}"'.format(hashlib.md5(value.encode()).hexdigest())
+
+    def get_private_etag(self, request):
+        """
+        Changes whenever the `cache_private_fields` of the current user do.
+        """
+        return ''
+
+    def get_conditional_response(self, request, get_response, *args, **kwargs):
+        """
+        Answers `If-None-Match` with a 304 when the ETag still matches, without
+        building the response.
+        """
+        etag = self.get_etag(request)
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag and (etag in etags or '*' in etags):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = get_response(request, *args, **kwargs)
+        if etag and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def get_cached_response(self, request):
+        cache_key = self.get_response_cache_key(request)
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is None:
+            return None
+
+        data, headers = cached
+        items = list(self._get_private_items(data))
+        if items:
+            self.resolve_private_fields(request, items)
+        return Response(data=data, headers=headers)
+
+    def cache_response(self, request, data, headers=None):
+        cache_key = self.get_response_cache_key(request)
+        if not cache_key:
+            return
+
+        data = copy.deepcopy(data)
+        for item in self._get_private_items(data):
+            for field in self.cache_private_fields:
+                if field in item:
+                    item[field] = None
+        cache.set(cache_key, (data, headers or {}), settings.RESPONSE_CACHE_TIMEOUT)
+
+    def resolve_private_fields(self, request, items):
+        """
+        Fills `cache_private_fields` of the serialized `items` of a cached
+        response for the current user.
+        """
+        pass
+
+    def _get_private_items(self, data):
+        if isinstance(data, dict):
+            if any(field in data for field in self.cache_private_fields):
+                yield data
+            for value in data.values():
+                yield from self._get_private_items(value)
+        elif isinstance(data, list):
+            for value in data:
+                yield from self._get_private_items(value)
+
     def not_found(self, request):
         return ErrorResponse(errors.THE_REQUESTED_OBJECT_NOT_FOUND)
 
@@ -218,16 +337,38 @@ class PaginatedViewSet(BaseViewSet):
     page_size = 20
 
     def get_pagination_class(self, objects, request):
+        if 'cursor' in request.query_params:
+            return CursorPagination(objects, request,
+                                    page_size=self.page_size)
         return PageNumberPagination(objects, request,
                                     page_size=self.page_size)
 
-    def list(self, request):
-        objects = self.get_queryset(request).all()
-        paginated = self.get_pagination_class(objects, request)
+    def get_list_queryset(self, request):
+        return self.get_queryset(request).all()
 
-        return Response(
-            data=self.serializer_class(
-                paginated.get_result(),
+    def get_list_serializer_class(self, request):
+        return self.serializer_class
+
+    def list(self, request):
+        return self.get_conditional_response(request, self.get_list_response)
+
+    def get_list_response(self, request):
+        response = self.get_cached_response(request)
+        if response is not None:
+            return response
+
+        # One transaction, so settings the paginator makes local to it hold for
+        # every query of the page.
+        with atomic():
+            objects = self.get_list_queryset(request)
+            paginated = self.get_pagination_class(objects, request)
+            objects = paginated.get_result()
+
+            data = self.get_list_serializer_class(request)(
+                objects,
                 many=True,
                 context=self.get_context(request)
-            ).data, headers=paginated.get_pagination_headers())
+            ).data
+            headers = paginated.get_pagination_headers()
+        self.cache_response(request, data, headers)
+        return Response(data=data, headers=headers)